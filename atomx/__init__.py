@@ -1,15 +1,26 @@
 # -*- coding: utf-8 -*-
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import (
     datetime,
     timedelta,
 )
 from inspect import isclass
-import requests
+from itertools import islice
+import json
+import time
+try:  # py3
+    from urllib.parse import urlencode
+except ImportError:  # py2
+    from urllib import urlencode
 from atomx.version import API_VERSION, VERSION
-from atomx import models
+from atomx import bulk, models
 from atomx.utils import (
+    get_model,
     get_model_name,
+    get_attribute_model_name,
+    iter_json_object,
     model_name_to_rest,
 )
 from atomx.exceptions import (
@@ -18,6 +29,12 @@ from atomx.exceptions import (
     InvalidCredentials,
     MissingArgumentError,
 )
+from atomx.transport import RequestsTransport, RetryPolicy
+from atomx.cache import ModelCache, ReportCache, ResponseCache, _project_report
+from atomx.debug import LazyLoadTracer
+from atomx.query import Query
+from atomx.reporting import ReportPoller, combine_reports, split_range
+from atomx.stats import Stats
 
 
 __title__ = 'atomx'
@@ -28,55 +45,237 @@ __copyright__ = 'Copyright 2015-2016 Spot Media Solutions Sdn. Bhd.'
 API_ENDPOINT = 'https://api.atomx.com/{}'.format(API_VERSION)
 
 
-class Atomx(object):
-    """Interface for the api on api.atomx.com.
-
-    To learn more about the api visit the
-    `atomx wiki <https://wiki.atomx.com/api>`_
-
-    :param str email: email address of your atomx user
-    :param str password:  password of your atomx user
-    :param str totp: 6 digit auth token if the account has 2-factor authentication enabled.
-    :param str api_endpoint: url for connections to the api
-        (defaults to `https://api.atomx.com/{API_VERSION}`)
-    :param bool save_response: If `True` save the last api response meta info
-        (without the resource payload) in :attr:`.Atomx.last_response`. (default: `True`)
-    :return: :class:`.Atomx` session to interact with the api
+class _AtomxBase(object):
+    """Request building and response decoding shared by
+    :class:`.Atomx` and :class:`atomx.aio.AsyncAtomx`.
     """
-    def __init__(self, email, password, totp=None,
-                 api_endpoint=API_ENDPOINT, save_response=True, expiration=None):
+    def __init__(self, api_endpoint=API_ENDPOINT, save_response=True, transport=None,
+                 pool_connections=10, pool_maxsize=10, model_cache=None, retry=True,
+                 rate_limiter=None, circuit_breaker=None, stats=None, lazy_load_tracer=None,
+                 response_cache=None):
         self.auth_token = None
         self.user = None
         self.api_endpoint = api_endpoint.rstrip('/') + '/'
         self.save_response = save_response
+        #: Transport used to send all HTTP requests of this session.
+        self.transport = transport or RequestsTransport(pool_connections=pool_connections,
+                                                        pool_maxsize=pool_maxsize)
         #: Contains the response of the last api call, if `save_response` was set `True`
         self.last_response = None
-        self.login(email, password, totp, expiration)
+        #: :class:`atomx.cache.ModelCache` of the session or `None`
+        self.model_cache = ModelCache() if model_cache is True else model_cache
+        #: :class:`atomx.cache.ResponseCache` of the session or `None`
+        self.response_cache = ResponseCache() if response_cache is True else response_cache
+        #: :class:`atomx.transport.RetryPolicy` of the session or `None`
+        self.retry = RetryPolicy() if retry is True else retry or None
+        #: :class:`atomx.transport.RateLimiter` of the session or `None`
+        self.rate_limiter = rate_limiter
+        #: :class:`atomx.transport.CircuitBreaker` of the session or `None`
+        self.circuit_breaker = circuit_breaker
+        #: :class:`atomx.stats.Stats` of the session or `None`
+        self.stats = Stats() if stats is True else stats
+        #: Functions called before each request with ``(method, url, kwargs)`` (`'request'`)
+        #: and after each response with ``(method, url, response, seconds)`` (`'response'`)
+        self.hooks = {'request': [], 'response': []}
+        #: :class:`atomx.debug.LazyLoadTracer` of the session or `None`
+        self.lazy_load_tracer = LazyLoadTracer() if lazy_load_tracer is True else lazy_load_tracer
+        self._report_poller = None
+        self._transaction = None
 
     @property
     def _auth_header(self):
         if self.auth_token:
             return {'Authorization': 'Bearer ' + self.auth_token}
 
-    def login(self, email, password, totp=None, expiration=None):
-        """Gets new authentication token for user ``email``.
+    def close(self):
+        """Close all connections of the session transport."""
+        close = getattr(self.transport, 'close', None)
+        if close:
+            close()
 
-        This method is automatically called in :meth:`__init__` so
-        you rarely have to call this method directly.
+    def logout(self):
+        """Removes authentication token from session."""
+        self.auth_token = None
+        self.user = None
 
-        :param str email: Email to use for login.
-        :param str password: Password to use for login.
-        :param str totp: 6 digit auth token if the account has 2-factor authentication enabled.
-        :param int expiration: Number of seconds that the auth token should be valid. (optional)
-        :return: None
-        :raises: :class:`.exceptions.InvalidCredentials` if ``email``/``password`` is wrong
+    @property
+    def report_poller(self):
+        """The :class:`atomx.reporting.ReportPoller` that polls the pending reports
+        of this session. Created on first use.
+        """
+        if self._report_poller is None:
+            self._report_poller = ReportPoller(self)
+        return self._report_poller
+
+    def _blocking_get(self, resource, params):
+        """`GET` ``resource`` without any caching. Blocks until the response is decoded,
+        also for async sessions, so it can be used from background threads.
         """
+        return self._get_result(self._send('GET', resource, params=params), cache=False)
+
+    def _send(self, method, resource, headers=None, **kwargs):
+        """Send a HTTP ``method`` request to ``resource`` with the session transport.
+        Blocks until the response is received.
+
+        Throttled, failed and unavailable requests are retried according to the
+        :attr:`retry` policy, within the limits of the :attr:`rate_limiter` and
+        :attr:`circuit_breaker` of the session.
+        """
+        if headers:
+            headers = dict(self._auth_header or {}, **headers)
+        else:
+            headers = self._auth_header
+        url = self.api_endpoint + resource
+        retry, limiter, breaker = self.retry, self.rate_limiter, self.circuit_breaker
+        stats, hooks = self.stats, self.hooks
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            if limiter is not None:
+                limiter.acquire()
+            for hook in hooks['request']:
+                hook(method, url, kwargs)
+            start = time.time()
+            try:
+                r = self.transport.request(method, url, headers=headers, **kwargs)
+            except Exception as e:
+                if stats is not None:
+                    stats.record_request(method, resource, time.time() - start, None)
+                if breaker is not None:
+                    breaker.record(error=e)
+                if retry is None or not retry.should_retry(method, attempt, error=e):
+                    raise
+                delay = retry.delay(attempt)
+            else:
+                seconds = time.time() - start
+                if stats is not None:
+                    self._record_response(method, resource, r, seconds, kwargs.get('stream'))
+                for hook in hooks['response']:
+                    hook(method, url, r, seconds)
+                if breaker is not None:
+                    breaker.record(response=r)
+                if r.ok or retry is None or not retry.should_retry(method, attempt, response=r):
+                    return r
+                delay = retry.delay(attempt, r)
+                if r.status_code == 429 and limiter is not None:
+                    limiter.pause(delay)
+                    delay = 0  # the rate limiter waits
+                r.close()  # release the connection of a streamed response
+            if stats is not None:
+                stats.record_retry(method, resource)
+            attempt += 1
+            time.sleep(delay)
+
+    def _record_response(self, method, resource, r, seconds, stream=False):
+        """Record the latency and size of the response ``r`` in :attr:`stats`."""
+        body = getattr(getattr(r, 'request', None), 'body', None)
+        if stream:  # don't consume streamed content
+            bytes_in = int(r.headers.get('Content-Length') or 0)
+        else:
+            bytes_in = len(r.content or b'')
+        self.stats.record_request(method, resource, seconds, r.status_code,
+                                  bytes_out=len(body) if body else 0, bytes_in=bytes_in)
+
+    @staticmethod
+    def _resource_path(resource, args):
+        """Compute the api path from a resource name, model class or model instance
+        and additional path ``args``.
+        """
+        if isclass(resource) and issubclass(resource, models.AtomxModel):
+            resource = resource._resource_name
+        elif hasattr(resource, '_resource_name'):
+            resource_path = resource._resource_name
+            if hasattr(resource, 'id'):
+                resource_path += '/' + str(resource.id)
+            resource = resource_path
+        else:
+            resource = resource.strip('/')
+        for a in args:
+            resource += '/' + str(a)
+        return resource
+
+    @staticmethod
+    def _delete_path(resource, args):
+        if hasattr(resource, '_resource_name') and hasattr(resource, 'id'):
+            resource = '{}/{}'.format(resource._resource_name, resource.id)
+        resource = resource.strip('/')
+        for a in args:
+            resource += '/' + str(a)
+        return resource
+
+    def _split_response(self, r, key=None):
+        """Returns the payload name, payload and meta info of the api response ``r``.
+
+        Raises :class:`.exceptions.APIError` if the request failed and saves
+        the meta info in :attr:`last_response`.
+        """
+        if self.stats is not None:
+            start = time.time()
+            r_json = r.json()
+            self.stats.record_decode(time.time() - start)
+        else:
+            r_json = r.json()
+        if not r.ok:
+            raise APIError(r_json['error'])
+        return self._split_json(r_json, key, r.headers)
+
+    def _split_json(self, r_json, key, headers):
+        """Like :meth:`_split_response` for an already decoded successful response."""
+        key = key or r_json['resource']
+        res = r_json.pop(key)
+        r_json['_headers'] = headers
+        if self.save_response:
+            self.last_response = r_json
+        return key, res, r_json
+
+    def _payload(self, r, key=None):
+        """Returns the payload name and payload of the api response ``r``.
+        See :meth:`_split_response`.
+        """
+        return self._split_response(r, key)[:2]
+
+    def _to_models(self, model_name, res, cache=True):
+        """Convert the api payload ``res`` of ``model_name`` to :mod:`.models` if possible.
+
+        If ``cache`` is `True` the models are added to the :attr:`model_cache`.
+        Models are tracked by the active :meth:`Atomx.transaction` of the session.
+        """
+        model = get_model_name(model_name)
+        if model and res:
+            start = time.time()
+            if isinstance(res, list):
+                result = [getattr(models, model)(session=self, **m) for m in res]
+            else:
+                result = getattr(models, model)(session=self, **res)
+            if self.stats is not None:
+                self.stats.record_models(time.time() - start,
+                                         len(result) if isinstance(result, list) else 1)
+            instances = [m for m in (result if isinstance(result, list) else [result])
+                         if isinstance(m, models.AtomxModel)]
+            if cache and self.model_cache is not None:
+                for m in instances:
+                    self.model_cache.add(m)
+            if self._transaction is not None:
+                self._transaction.add(*instances)
+            return result
+        elif model_name == 'reporting':  # special case for `/reports` status
+            return {
+                'reports': [models.Report(session=self, **m) for m in res['reports']],
+                'scheduled': [models.Report(session=self, **m) for m in res['scheduled']]
+            }
+        return res
+
+    @staticmethod
+    def _login_json(email, password, totp=None, expiration=None):
         json = {'email': email, 'password': password}
         if totp:
             json['totp'] = str(totp)
         if expiration:
             json['expiration'] = expiration
-        r = requests.post(self.api_endpoint + 'login', json=json)
+        return json
+
+    def _login_result(self, r):
         if not r.ok:
             if r.status_code == 401:
                 raise InvalidCredentials
@@ -84,57 +283,17 @@ class Atomx(object):
         self.auth_token = r.json()['auth_token']
         self.user = models.User(session=self, **r.json()['user'])
 
-    def logout(self):
-        """Removes authentication token from session."""
-        self.auth_token = None
-        self.user = None
-
-    def search(self, query, index=None):
-        """Search for ``query``.
-
-        Returns a `dict` with all found results for:
-        'Advertisers', 'Campaigns', 'Creatives', 'Placements', 'Publishers', 'Sites'.
-
-        The resulting :mod:`.models` have only `id` and `name` loaded since that's
-        what's returned from the api `/search` call, but attributes will be lazy loaded
-        once you try to accessed them.
-        Or you can just fetch everything with one api call with :meth:`.AtomxModel.reload`.
-
-        Example::
-
-            >>> atomx = Atomx('apiuser@example.com', 'password')
-            >>> search_result = atomx.search('atomx')
-            >>> assert 'campaigns' in search_result
-            >>> campaign = search_result['campaigns'][0]
-            >>> assert isinstance(campaign, models.Campaign)
-            >>> # campaign has only `id` and `name` loaded but you
-            >>> # can still access (lazy load) all attributes
-            >>> assert isinstance(campaign.budget, float)
-            >>> # or reload all attributes with one api call
-            >>> campaign.reload()
-
-        :param str query: keyword to search for.
-        :param list index: :class:`str` or :class:`list` of the indexes you want to get returned.
-            E.g. ``index=['campaigns', 'domains']``.
-        :return: dict with list of :mod:`.models` as values
-        """
+    @staticmethod
+    def _search_params(query, index=None):
         params = {'q': query}
         if index:
             if isinstance(index, list):
                 index = ','.join(index)
             params['index'] = index
-        r = requests.get(self.api_endpoint + 'search',
-                         params=params,
-                         headers=self._auth_header)
-        r_json = r.json()
-        if not r.ok:
-            raise APIError(r_json['error'])
-        search_result = r_json['search']
+        return params
 
-        if self.save_response:
-            del r_json['search']
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
+    def _search_result(self, r):
+        search_result = self._payload(r, 'search')[1]
 
         # convert publisher, creative dicts etc from search result to Atomx.model
         for m in search_result.keys():
@@ -144,54 +303,11 @@ class Atomx(object):
                                     for v in search_result[m]]
         return search_result
 
-    def report(self, scope=None, groups=None, metrics=None, where=None,
-               from_=None, to=None, daterange=None, timezone='UTC',
-               emails=None, when=None, interval=None, name=None,
-               sort=None, limit=None, offset=None, save=True, editable=False):
-        """Create a report.
-
-        See the `reporting atomx wiki <https://wiki.atomx.com/reporting>`_
-        for details about parameters and available groups, metrics.
-
-        :param str scope: Specifies the report type. Should be one of:
-            'advertiser', 'publisher', 'inventory', 'dsp',
-            'network_managed', 'network_buy', 'network_sell'.
-            If undefined it tries to determine the `scope` automatically based
-            on the access rights of the api user.
-        :param list groups: columns to group by.
-        :param list metrics: columns to sum on.
-        :param list where: is a list of expression lists.
-            An expression list is in the form of ``[column, op, value]``:
-
-                - ``column`` can be any of the ``groups`` or ``metrics`` parameter columns.
-                - ``op`` can be any of ``==``, ``!=``, ``<``, ``>``, ``in`` or ``not in`` as a string.
-                - ``value`` is either a number or in case of ``in``
-                  and ``not in`` a list of numbers.
-
-        :param datetime.datetime from_: :class:`datetime.datetime` where the report
-            should start (inclusive). (Defaults to last week)
-        :param datetime.datetime to: :class:`datetime.datetime` where the report
-            should end (exclusive). (Defaults to `datetime.now()` if undefined)
-        :param str daterange: Use :param:`daterange` to automatically set the reports
-        `from` and `to` parameters relativ to the current date.
-        Both :param:`from_` and :param:`to` have to be ``None`` for it.
-        Dateranges are: today, yesterday, last7days, last14days, last30days, monthtodate,
-                        lastmonth, yeartodate, lifetime. (Defaults to ``None``)
-        :param str timezone:  Timezone used for all times. (Defaults to `UTC`)
-            For a supported list see https://wiki.atomx.com/timezones
-        :param emails: One or multiple email addresses that should get
-            notified once the report is finished and ready to download.
-        :type emails: str or list
-        :param str when: When should the scheduled report run. (daily, monthly, monday-sunday)
-        :param str interval: Time period included in the scheduled report ('N days' or 'N month')
-        :param str name: Optional name for the report.
-        :param str or list sort: List of columns to sort by.
-        :param int limit: Number of rows to return
-        :param int offset: Number of rows to skip.
-        :param bool save: Should the report appear in the users report history (defaults to `True`).
-        :param bool editable: Should other users be able to change the date range of this report.
-        :return: A :class:`atomx.models.Report` model
-        """
+    def _report_request(self, scope=None, groups=None, metrics=None, where=None,
+                        from_=None, to=None, daterange=None, timezone='UTC',
+                        emails=None, when=None, interval=None, name=None,
+                        sort=None, limit=None, offset=None, save=True, editable=False):
+        """Returns the URL parameters and json body for a :meth:`.Atomx.report` request."""
         report_json = {'timezone': timezone, 'save': save, 'editable': editable}
 
         if name:
@@ -255,19 +371,359 @@ class Atomx(object):
             if isinstance(sort, list):
                 sort = ','.join(sort)
             params['sort'] = sort
-        r = requests.post(self.api_endpoint + 'report',
-                          params=params, json=report_json, headers=self._auth_header)
+        return params, report_json
+
+    def _report_result(self, r):
+        return models.Report(session=self, **self._payload(r, 'report')[1])
+
+    def _get_result(self, r, cache=True):
+        return self._to_models(*self._payload(r), cache=cache)
+
+    @staticmethod
+    def _cache_resource(resource):
+        """Returns the :attr:`.AtomxModel._resource_name` for the api ``resource`` name."""
+        model = get_model_name(resource)
+        return getattr(models, model)._resource_name if model else resource
+
+    def _cached_model(self, resource, kwargs):
+        """Returns the model for the single model path ``resource``
+        from the :attr:`model_cache` or `None`.
+        The model is tracked by the active :meth:`Atomx.transaction`.
+        """
+        if self.model_cache is None or kwargs:
+            return None
+        parts = resource.split('/')
+        if len(parts) != 2 or not parts[1].isdigit():  # not a `<resource>/<id>` path
+            return None
+        model = self.model_cache.get(self._cache_resource(parts[0]), parts[1])
+        if model is not None and self._transaction is not None:
+            self._transaction.add(model)
+        return model
+
+    def _conditional_request(self, resource, params):
+        """Returns the :attr:`response_cache` key, the cached response and the
+        validator headers for a `GET` of ``resource`` or `None` if it isn't cached.
+        """
+        cache = self.response_cache
+        if cache is None or not cache.is_cacheable(self._cache_resource(resource.split('/')[0])):
+            return None
+        key = cache.key(resource, params)
+        cached = cache.get(key)
+        return key, cached, cached.headers() if cached is not None else {}
+
+    def _conditional_result(self, resource, params, key, cached, r, cache=True):
+        """Returns the models and meta info of the conditional `GET` response ``r``.
+
+        `304 Not Modified` responses return the ``cached`` models, new responses
+        are decoded and stored in the :attr:`response_cache` if they have validators.
+        """
+        if r.status_code == 304 and cached is None:
+            # nothing to reuse (e.g. a proxy answered), request the full response
+            r.close()
+            r = self._send('GET', resource, params=params, headers={'Cache-Control': 'no-cache'})
+            if r.status_code == 304:
+                raise APIError('`304 Not Modified` for an unconditional request to {}'.format(
+                    resource))
+        not_modified = r.status_code == 304 and cached is not None
+        self.response_cache.record(not_modified)
+        if self.stats is not None and cached is not None:
+            self.stats.record_revalidation('GET', resource, not_modified)
+        if not_modified:
+            meta = dict(cached.meta, _headers=r.headers)
+            if self.save_response:
+                self.last_response = meta
+            if self._transaction is not None:
+                self._transaction.add(*cached.models)
+            return cached.result, meta
+
+        model_name, res, meta = self._split_response(r)
+        result = self._to_models(model_name, res, cache=cache)
+        etag, last_modified = r.headers.get('ETag'), r.headers.get('Last-Modified')
+        if etag or last_modified:
+            self.response_cache.set(key, etag, last_modified, result,
+                                    dict((k, v) for k, v in meta.items() if k != '_headers'))
+        return result, meta
+
+    def _invalidate_cache(self, resource):
+        """Remove the model at path ``resource`` from the :attr:`model_cache`."""
+        if self.model_cache is not None:
+            parts = resource.split('/')
+            if len(parts) == 2:
+                self.model_cache.invalidate(self._cache_resource(parts[0]), parts[1])
+
+    def _post_result(self, r):
+        model_name, res = self._payload(r)
+        if get_model_name(model_name) and isinstance(res, list):
+            return self._to_models(model_name, res)
+        return res
+
+
+class Atomx(_AtomxBase):
+    """Interface for the api on api.atomx.com.
+
+    To learn more about the api visit the
+    `atomx wiki <https://wiki.atomx.com/api>`_
+
+    :param str email: email address of your atomx user
+    :param str password:  password of your atomx user
+    :param str totp: 6 digit auth token if the account has 2-factor authentication enabled.
+    :param str api_endpoint: url for connections to the api
+        (defaults to `https://api.atomx.com/{API_VERSION}`)
+    :param bool save_response: If `True` save the last api response meta info
+        (without the resource payload) in :attr:`.Atomx.last_response`. (default: `True`)
+    :param int expiration: Number of seconds that the auth token should be valid. (optional)
+    :param transport: Object that sends the HTTP requests.
+        (defaults to a pooled :class:`atomx.transport.RequestsTransport`)
+    :param int pool_connections: Number of connection pools to cache in the default
+        transport. (default: 10)
+    :param int pool_maxsize: Maximum number of keep-alive connections per host
+        in the default transport. (default: 10)
+    :param model_cache: :class:`atomx.cache.ModelCache` to cache models of this session in.
+        `True` to use a :class:`atomx.cache.ModelCache` with default settings.
+        (default: `None`)
+    :param disk_cache: :class:`atomx.cache.DiskCache` to persistently cache responses of
+        reference data resources in. (default: `None`)
+    :param response_cache: :class:`atomx.cache.ResponseCache` to revalidate `GET` requests
+        with `ETag`/`Last-Modified` and reuse the models of unchanged responses.
+        `True` to use a :class:`atomx.cache.ResponseCache` with default settings.
+        (default: `None`)
+    :param report_cache: :class:`atomx.cache.ReportCache` to cache the results of
+        :meth:`report` in. `True` to use an in memory :class:`atomx.cache.ReportCache`
+        with default settings. (default: `None`)
+    :param retry: :class:`atomx.transport.RetryPolicy` for throttled (`429`) and failed
+        requests. `True` to use the default :class:`atomx.transport.RetryPolicy`,
+        `None` to never retry. (default: `True`)
+    :param rate_limiter: :class:`atomx.transport.RateLimiter` to limit the request rate.
+        Can be shared by multiple sessions. (default: `None`)
+    :param circuit_breaker: :class:`atomx.transport.CircuitBreaker` that stops sending
+        requests while the api keeps failing. (default: `None`)
+    :param stats: :class:`atomx.stats.Stats` to record request timings and sizes,
+        decode and model build times and lazy loads in. `True` to create one. (default: `None`)
+    :param lazy_load_tracer: :class:`atomx.debug.LazyLoadTracer` that records, warns about
+        or forbids lazy loading model attributes. `True` to create one that warns
+        about N+1 requests. (default: `None`)
+    :return: :class:`.Atomx` session to interact with the api
+    """
+    def __init__(self, email, password, totp=None,
+                 api_endpoint=API_ENDPOINT, save_response=True, expiration=None,
+                 transport=None, pool_connections=10, pool_maxsize=10, model_cache=None,
+                 disk_cache=None, report_cache=None, retry=True, rate_limiter=None,
+                 circuit_breaker=None, stats=None, lazy_load_tracer=None, response_cache=None):
+        super(Atomx, self).__init__(api_endpoint=api_endpoint, save_response=save_response,
+                                    transport=transport, pool_connections=pool_connections,
+                                    pool_maxsize=pool_maxsize, model_cache=model_cache,
+                                    retry=retry, rate_limiter=rate_limiter,
+                                    circuit_breaker=circuit_breaker, stats=stats,
+                                    lazy_load_tracer=lazy_load_tracer,
+                                    response_cache=response_cache)
+        #: :class:`atomx.cache.DiskCache` of the session or `None`
+        self.disk_cache = disk_cache
+        #: :class:`atomx.cache.ReportCache` of the session or `None`
+        self.report_cache = ReportCache() if report_cache is True else report_cache
+        self.login(email, password, totp, expiration)
+
+    def _get_response(self, resource, params):
+        """`GET` ``resource`` and return the payload name, payload and meta info.
+
+        Responses of resources configured in :attr:`disk_cache` are served
+        from the cache or revalidated with conditional requests.
+        """
+        cache = self.disk_cache
+        if cache is None or self._cache_resource(resource.split('/')[0]) not in cache.resources:
+            return self._split_response(self._send('GET', resource, params=params))
+
+        key = self.api_endpoint + resource + '?' + urlencode(sorted(params.items()))
+        cached = cache.get(key)
+        headers = {}
+        if cached is not None:
+            if cache.is_fresh(cached):
+                return self._split_json(json.loads(cached.content.decode('utf-8')), None, {})
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        r = self._send('GET', resource, params=params, headers=headers)
+        if r.status_code == 304 and cached is not None:
+            cache.touch(key)
+            return self._split_json(json.loads(cached.content.decode('utf-8')), None, r.headers)
         r_json = r.json()
         if not r.ok:
             raise APIError(r_json['error'])
-        report = r_json['report']
+        cache.set(key, r.content, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+        return self._split_json(r_json, None, r.headers)
 
-        if self.save_response:
-            del r_json['report']
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
+    def login(self, email, password, totp=None, expiration=None):
+        """Gets new authentication token for user ``email``.
+
+        This method is automatically called in :meth:`__init__` so
+        you rarely have to call this method directly.
+
+        :param str email: Email to use for login.
+        :param str password: Password to use for login.
+        :param str totp: 6 digit auth token if the account has 2-factor authentication enabled.
+        :param int expiration: Number of seconds that the auth token should be valid. (optional)
+        :return: None
+        :raises: :class:`.exceptions.InvalidCredentials` if ``email``/``password`` is wrong
+        """
+        r = self._send('POST', 'login',
+                       json=self._login_json(email, password, totp, expiration))
+        self._login_result(r)
+
+    def search(self, query, index=None):
+        """Search for ``query``.
+
+        Returns a `dict` with all found results for:
+        'Advertisers', 'Campaigns', 'Creatives', 'Placements', 'Publishers', 'Sites'.
+
+        The resulting :mod:`.models` have only `id` and `name` loaded since that's
+        what's returned from the api `/search` call, but attributes will be lazy loaded
+        once you try to accessed them.
+        Or you can just fetch everything with one api call with :meth:`.AtomxModel.reload`.
+
+        Example::
+
+            >>> atomx = Atomx('apiuser@example.com', 'password')
+            >>> search_result = atomx.search('atomx')
+            >>> assert 'campaigns' in search_result
+            >>> campaign = search_result['campaigns'][0]
+            >>> assert isinstance(campaign, models.Campaign)
+            >>> # campaign has only `id` and `name` loaded but you
+            >>> # can still access (lazy load) all attributes
+            >>> assert isinstance(campaign.budget, float)
+            >>> # or reload all attributes with one api call
+            >>> campaign.reload()
+
+        :param str query: keyword to search for.
+        :param list index: :class:`str` or :class:`list` of the indexes you want to get returned.
+            E.g. ``index=['campaigns', 'domains']``.
+        :return: dict with list of :mod:`.models` as values
+        """
+        r = self._send('GET', 'search', params=self._search_params(query, index))
+        return self._search_result(r)
+
+    def report(self, scope=None, groups=None, metrics=None, where=None,
+               from_=None, to=None, daterange=None, timezone='UTC',
+               emails=None, when=None, interval=None, name=None,
+               sort=None, limit=None, offset=None, save=True, editable=False,
+               split=None, workers=4):
+        """Create a report.
+
+        See the `reporting atomx wiki <https://wiki.atomx.com/reporting>`_
+        for details about parameters and available groups, metrics.
 
-        return models.Report(session=self, **report)
+        :param str scope: Specifies the report type. Should be one of:
+            'advertiser', 'publisher', 'inventory', 'dsp',
+            'network_managed', 'network_buy', 'network_sell'.
+            If undefined it tries to determine the `scope` automatically based
+            on the access rights of the api user.
+        :param list groups: columns to group by.
+        :param list metrics: columns to sum on.
+        :param list where: is a list of expression lists.
+            An expression list is in the form of ``[column, op, value]``:
+
+                - ``column`` can be any of the ``groups`` or ``metrics`` parameter columns.
+                - ``op`` can be any of ``==``, ``!=``, ``<``, ``>``, ``in`` or ``not in`` as a string.
+                - ``value`` is either a number or in case of ``in``
+                  and ``not in`` a list of numbers.
+
+        :param datetime.datetime from_: :class:`datetime.datetime` where the report
+            should start (inclusive). (Defaults to last week)
+        :param datetime.datetime to: :class:`datetime.datetime` where the report
+            should end (exclusive). (Defaults to `datetime.now()` if undefined)
+        :param str daterange: Use :param:`daterange` to automatically set the reports
+        `from` and `to` parameters relativ to the current date.
+        Both :param:`from_` and :param:`to` have to be ``None`` for it.
+        Dateranges are: today, yesterday, last7days, last14days, last30days, monthtodate,
+                        lastmonth, yeartodate, lifetime. (Defaults to ``None``)
+        :param str timezone:  Timezone used for all times. (Defaults to `UTC`)
+            For a supported list see https://wiki.atomx.com/timezones
+        :param emails: One or multiple email addresses that should get
+            notified once the report is finished and ready to download.
+        :type emails: str or list
+        :param str when: When should the scheduled report run. (daily, monthly, monday-sunday)
+        :param str interval: Time period included in the scheduled report ('N days' or 'N month')
+        :param str name: Optional name for the report.
+        :param str or list sort: List of columns to sort by.
+        :param int limit: Number of rows to return
+        :param int offset: Number of rows to skip.
+        :param bool save: Should the report appear in the users report history (defaults to `True`).
+        :param bool editable: Should other users be able to change the date range of this report.
+        :param str split: Split the report in sub-reports per `hour`, `day` or `week`
+            that are created in parallel and combined, for reports over long time ranges
+            that would time out otherwise. Rows with the same groups in different
+            sub-reports are added up, so only use additive metrics (e.g. impressions,
+            clicks, revenue but not ctr) or a time group at least as fine as ``split``.
+            Can't be combined with ``limit``, ``offset``, ``sort``, ``daterange``,
+            ``emails`` or scheduled reports. ``name`` and ``save`` are used for every
+            sub-report. (Defaults to ``None``)
+        :param int workers: Maximum number of sub-reports to create in parallel
+            if ``split`` is set. (default: 4)
+        :return: A :class:`atomx.models.Report` model
+
+        If the session has a :attr:`report_cache`, identical reports are
+        only requested once and then returned from the cache.
+        """
+        if split:
+            return self._split_report(
+                split, workers, scope=scope, groups=groups, metrics=metrics, where=where,
+                from_=from_, to=to, timezone=timezone, limit=limit, offset=offset,
+                sort=sort, daterange=daterange, emails=emails, when=when, interval=interval,
+                name=name, save=save, editable=editable)
+
+        params, report_json = self._report_request(
+            scope=scope, groups=groups, metrics=metrics, where=where, from_=from_, to=to,
+            daterange=daterange, timezone=timezone, emails=emails, when=when,
+            interval=interval, name=name, sort=sort, limit=limit, offset=offset,
+            save=save, editable=editable)
+        cache = self.report_cache
+        if cache is None or not cache.is_cacheable(report_json):
+            r = self._send('POST', 'report', params=params, json=report_json)
+            return self._report_result(r)
+
+        def load():
+            r = self._send('POST', 'report', params=params, json=report_json)
+            payload = self._payload(r, 'report')[1]
+            ready = models.Report(**payload).is_ready
+            return payload, cache.report_ttl(report_json) if ready else 0
+
+        key = cache.key(report_json, params, (self.api_endpoint, self.user._attributes.get('id')))
+        return models.Report(session=self, **_project_report(cache.fetch(key, load), report_json))
+
+    def _split_report(self, split, workers, from_=None, to=None, name=None, save=True,
+                      **kwargs):
+        """Create the report for ``from_`` - ``to`` as sub-reports per ``split``
+        and combine them. See :meth:`report`.
+        """
+        for key in ('limit', 'offset', 'sort', 'daterange', 'emails', 'when', 'interval'):
+            if kwargs.pop(key):
+                raise ValueError("`{}` can't be used together with `split`.".format(key))
+        if to is None:
+            to = datetime.now()
+        if from_ is None:
+            from_ = to - timedelta(days=7)
+        from_, to = [datetime.strptime(t, '%Y-%m-%d %H:00:00') if not isinstance(t, datetime)
+                     else t.replace(minute=0, second=0, microsecond=0) for t in (from_, to)]
+        ranges = split_range(from_, to, split)
+        if not ranges:
+            raise ValueError('`from_` has to be before `to`.')
+
+        def create(time_range):
+            report = self.report(from_=time_range[0], to=time_range[1], name=name, save=save,
+                                 **kwargs)
+            if not report.is_ready:
+                report.wait()
+            return report
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(ranges)))) as executor:
+            reports = list(executor.map(create, ranges))
+        params, report_json = self._report_request(from_=from_, to=to, name=name, save=save,
+                                                   **kwargs)
+        columns, data, totals = combine_reports(reports, report_json.get('groups') or [],
+                                                report_json.get('metrics') or [])
+        return models.Report(id=None, session=self, query=report_json, name=name,
+                             columns=columns, data=data, length=len(data), totals=totals,
+                             from_=report_json['from'], to=report_json['to'])
 
     def get(self, resource, *args, **kwargs):
         """Returns a list of models from :mod:`.models` if you query for
@@ -325,39 +781,303 @@ class Atomx(object):
 
         :return: a class from :mod:`.models` or a list of models depending on param `resource`
         """
-        if isclass(resource) and issubclass(resource, models.AtomxModel):
-            resource = resource._resource_name
-        elif hasattr(resource, '_resource_name'):
-            resource_path = resource._resource_name
-            if hasattr(resource, 'id'):
-                resource_path += '/' + str(resource.id)
-            resource = resource_path
-        else:
-            resource = resource.strip('/')
-        for a in args:
-            resource += '/' + str(a)
-        r = requests.get(self.api_endpoint + resource, params=kwargs, headers=self._auth_header)
-        if not r.ok:
-            raise APIError(r.json()['error'])
+        resource = self._resource_path(resource, args)
+        cached = self._cached_model(resource, kwargs)
+        if cached is not None:
+            return cached
+        return self._get_page(resource, kwargs)[0]
+
+    def _get_page(self, resource, params):
+        """Returns the decoded models and the response meta info of a `GET` request."""
+        # models with only some attributes loaded don't belong in the cache
+        cache = 'attributes' not in params
+        disk_cache = self.disk_cache
+        if disk_cache is None or \
+                self._cache_resource(resource.split('/')[0]) not in disk_cache.resources:
+            conditional = self._conditional_request(resource, params)
+            if conditional is not None:
+                key, cached, headers = conditional
+                r = self._send('GET', resource, params=params, headers=headers)
+                return self._conditional_result(resource, params, key, cached, r, cache)
+        model_name, res, meta = self._get_response(resource, params)
+        return self._to_models(model_name, res, cache=cache), meta
+
+    def iter(self, resource, *args, **kwargs):
+        """Iterate over all models of a list ``resource`` page by page.
+
+        Only one page (and the prefetched next page) is held in memory at a time,
+        so this is the way to go through large resources like `domains` or `sites`.
+        Stops once the total ``count`` from the api response meta info
+        is reached or the api returns a short page.
 
-        r_json = r.json()
-        model_name = r_json['resource']
-        res = r_json[model_name]
-        if self.save_response:
-            del r_json[model_name]
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
-        model = get_model_name(model_name)
-        if model and res:
-            if isinstance(res, list):
-                return [getattr(models, model)(session=self, **m) for m in res]
-            return getattr(models, model)(session=self, **res)
-        elif model_name == 'reporting':  # special case for `/reports` status
-            return {
-                'reports': [models.Report(session=self, **m) for m in res['reports']],
-                'scheduled': [models.Report(session=self, **m) for m in res['scheduled']]
-            }
-        return res
+        Example::
+
+            >>> for domain in atomx.iter('domains', page_size=1000, hostname='*atom*'):
+            ...     print(domain.hostname)
+
+        :param resource: Specify the resource to get from the atomx api.
+            Same as in :meth:`get`.
+        :param args: All non-keyword arguments will get used to compute the ``resource``.
+        :param int page_size: Number of models to request per api call. (default: 100)
+        :param bool prefetch: Request the next page in a background thread
+            while the current page gets consumed. (default: `True`)
+        :param int workers: If > 1, request the remaining pages with that many
+            threads in parallel once the total ``count`` is known. See :meth:`get_all`.
+            (default: 1)
+        :param kwargs: Any other argument is passed as URL parameter to the respective
+            api endpoint. ``offset`` sets where to start and ``limit``
+            the maximum number of models to return.
+        :return: generator of :mod:`.models`
+        """
+        page_size = kwargs.pop('page_size', 100)
+        prefetch = kwargs.pop('prefetch', True)
+        workers = kwargs.pop('workers', 1)
+        offset = kwargs.pop('offset', 0)
+        limit = kwargs.pop('limit', None)
+        end = offset + limit if limit is not None else None
+        resource = self._resource_path(resource, args)
+
+        def fetch(page_offset, page_limit=None):
+            if page_limit is None:
+                page_limit = page_size if end is None else min(page_size, end - page_offset)
+            return self._get_page(resource, dict(kwargs, offset=page_offset, limit=page_limit))
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch and workers <= 1 else None
+        next_page = None
+        try:
+            page, meta = fetch(offset)
+            while True:
+                if not isinstance(page, list):  # not a list resource
+                    if page:
+                        yield page
+                    return
+                offset += len(page)
+                count = meta.get('count')
+                if count is not None:
+                    end = count if end is None else min(end, count)
+                more = len(page) == page_size if count is None else len(page) > 0
+                more = more and (end is None or offset < end)
+                if more and workers > 1 and end is not None:
+                    # all remaining offsets are known, fan out the page requests.
+                    # the api may return less than `page_size` models per request,
+                    # so step by the size of the first page.
+                    page_size = len(page)
+                    for model in page:
+                        yield model
+                    offsets = range(offset, end, page_size)
+                    for page_offset, page in zip(offsets, self._parallel_pages(
+                            fetch, offsets, workers)):
+                        for model in page:
+                            yield model
+                        # request the rest of short pages so no models are skipped
+                        missing = min(page_size, end - page_offset) - len(page)
+                        while page and missing > 0:
+                            page = fetch(page_offset + page_size - missing, missing)[0]
+                            for model in page:
+                                yield model
+                            missing -= len(page)
+                    return
+                if more and executor:
+                    next_page = executor.submit(fetch, offset)
+                for model in page:
+                    yield model
+                if not more:
+                    return
+                page, meta = next_page.result() if executor else fetch(offset)
+                next_page = None
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+            if executor:
+                executor.shutdown(wait=False)
+
+    @staticmethod
+    def _parallel_pages(fetch, offsets, workers):
+        """Yields the models of ``fetch(offset)`` for all ``offsets`` in order.
+
+        The pages are requested by a pool of ``workers`` threads with at most
+        ``2 * workers`` pages requested or waiting to be consumed at a time.
+        The first failed request stops all others and re-raises its error.
+        """
+        offsets = iter(offsets)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for page_offset in islice(offsets, 2 * workers):
+                pending.append(executor.submit(fetch, page_offset))
+            while pending:
+                for future in pending:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                page = pending.popleft().result()[0]
+                for page_offset in islice(offsets, 1):
+                    pending.append(executor.submit(fetch, page_offset))
+                yield page
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def get_all(self, resource, *args, **kwargs):
+        """Get all models of a list ``resource`` with parallel requests.
+
+        The total number of models is taken from the ``count`` of the first
+        response and the remaining pages are requested with ``workers`` threads.
+        Results keep the api order. If any request fails the remaining
+        requests are cancelled and the error is raised.
+
+        Example::
+
+            >>> domains = atomx.get_all('domains', workers=8, page_size=1000)
+
+        :param resource: Specify the resource to get from the atomx api.
+            Same as in :meth:`get`.
+        :param args: All non-keyword arguments will get used to compute the ``resource``.
+        :param int workers: Number of concurrent requests. (default: 4)
+        :param int page_size: Number of models to request per api call. (default: 100)
+        :param kwargs: Any other argument is passed as URL parameter to the respective
+            api endpoint like in :meth:`iter`.
+        :return: `list` of :mod:`.models`
+        """
+        kwargs.setdefault('workers', 4)
+        return list(self.iter(resource, *args, **kwargs))
+
+    def stream(self, resource, *args, **kwargs):
+        """Like :meth:`get` but decodes the response incrementally while it is
+        downloaded and yields the models one by one.
+
+        The response is never held in memory as a whole, neither as json nor
+        as list of models, which makes this the most memory efficient way to get
+        a large list resource with a single request.
+        Only the payload named by the `resource` of the response is yielded.
+        Other arrays of the response are kept with the response meta info
+        that is saved in :attr:`last_response` once the generator is exhausted.
+
+        Example::
+
+            >>> for domain in atomx.stream('domains', limit=100000):
+            ...     print(domain.hostname)
+
+        :param resource: Specify the resource to get from the atomx api.
+            Same as in :meth:`get`.
+        :param args: All non-keyword arguments will get used to compute the ``resource``.
+        :param int chunk_size: Number of bytes to read at once. (default: 65536)
+        :param kwargs: Any other argument is passed as URL parameter to the respective
+            api endpoint.
+        :return: generator of :mod:`.models`
+        """
+        chunk_size = kwargs.pop('chunk_size', 65536)
+        r = self._send('GET', self._resource_path(resource, args), params=kwargs,
+                       stream=True)
+        try:
+            if not r.ok:
+                raise APIError(r.json()['error'])
+            meta = {}
+            for event, key, value in iter_json_object(r.iter_content(chunk_size)):
+                if event == 'value':
+                    meta[key] = value
+                    continue
+                if key != meta.get('resource'):  # other arrays belong to the meta info
+                    meta.setdefault(key, []).append(value)
+                    continue
+                model = get_model(key)
+                if model is not None and isinstance(value, dict):
+                    yield model(session=self, **value)
+                else:
+                    yield value
+            # payload that isn't a list of models or was sent before its `resource` name
+            if meta.get('resource') in meta:
+                res = self._to_models(meta['resource'], meta.pop(meta['resource']),
+                                      cache=False)
+                for m in res if isinstance(res, list) else [res]:
+                    yield m
+            meta['_headers'] = r.headers
+            if self.save_response:
+                self.last_response = meta
+        finally:
+            r.close()
+
+    def query(self, model):
+        """Returns a :class:`atomx.query.Query` for ``model`` to select the fields
+        and filters of a list request.
+
+        Example::
+
+            >>> campaigns = atomx.query(models.Campaign).only('budget').filter(
+            ...     state='ACTIVE').all()
+
+        :param model: :class:`.models.AtomxModel` class or resource name.
+        :return: :class:`atomx.query.Query`
+        """
+        return Query(self, model)
+
+    def prefetch(self, models_list, *attributes, **kwargs):
+        """Load related models of all ``models_list`` with as few api calls as possible.
+
+        Attributes that reference other models by id (e.g. ``campaign.advertiser``
+        or ``profile.domains_filter``) are normally lazy loaded with one api request
+        per model. :meth:`prefetch` collects the ids of all ``models_list`` and loads them
+        with `id` filtered list requests instead, so accessing the attributes afterwards
+        doesn't make any requests.
+
+        Example::
+
+            >>> campaigns = atomx.get('campaigns', limit=2000)
+            >>> atomx.prefetch(campaigns, 'advertiser', 'profile', 'profile.domains_filter')
+            >>> advertisers = [c.advertiser for c in campaigns]  # no api requests
+
+        :param list models_list: :mod:`.models` to load the related models for.
+        :param attributes: Names of the attributes to load. Use ``.`` to prefetch
+            attributes of the prefetched models.
+        :param int chunk_size: Maximum number of ids per request. (default: 100)
+        :return: ``models_list``
+        """
+        chunk_size = kwargs.pop('chunk_size', 100)
+        for attribute in attributes:
+            path = attribute.split('.')
+            current = list(models_list)
+            for attr in path:
+                current = self._prefetch_attribute(current, attr, chunk_size)
+        return models_list
+
+    def _prefetch_attribute(self, models_list, attribute, chunk_size):
+        """Load and attach the models referenced by ``attribute`` of ``models_list``.
+
+        :return: `list` of the related models.
+        """
+        model_name = get_attribute_model_name(attribute)
+        if not model_name:
+            return []
+        ids = set()
+        for m in models_list:
+            value = m._attributes.get(attribute)
+            if isinstance(value, int):
+                ids.add(value)
+            elif isinstance(value, list) and value and isinstance(value[0], int):
+                ids.update(value)
+
+        loaded = {}
+        ids = sorted(ids)
+        resource = getattr(models, model_name)._resource_name
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            res = self.get(resource, id=','.join(str(c) for c in chunk), limit=len(chunk))
+            for related in res if isinstance(res, list) else [res]:
+                loaded[related.id] = related
+
+        related_models = []
+        for m in models_list:
+            value = m._attributes.get(attribute)
+            if isinstance(value, int) and value in loaded:
+                m._attributes[attribute] = loaded[value]
+            elif isinstance(value, list) and value and all(v in loaded for v in value):
+                m._attributes[attribute] = [loaded[v] for v in value]
+            value = m._attributes.get(attribute)
+            if isinstance(value, models.AtomxModel):
+                related_models.append(value)
+            elif isinstance(value, list):
+                related_models.extend(v for v in value if isinstance(v, models.AtomxModel))
+        return related_models
 
     def post(self, resource, json, **kwargs):
         """Send HTTP POST to ``resource`` with ``json`` content.
@@ -369,21 +1089,8 @@ class Atomx(object):
         :param kwargs: URL Parameters of the request.
         :return: :class:`dict` with the newly created resource.
         """
-        r = requests.post(self.api_endpoint + resource.strip('/'),
-                          json=json, params=kwargs, headers=self._auth_header)
-        r_json = r.json()
-        if not r.ok:
-            raise APIError(r_json['error'])
-        model_name = r_json['resource']
-        res = r_json[model_name]
-        if self.save_response:
-            del r_json[model_name]
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
-        model = get_model_name(model_name)
-        if model and isinstance(res, list):
-            return [getattr(models, model)(session=self, **m) for m in res]
-        return res
+        r = self._send('POST', resource.strip('/'), json=json, params=kwargs)
+        return self._post_result(r)
 
     def put(self, resource, id, json, **kwargs):
         """Send HTTP PUT to ``resource``/``id`` with ``json`` content.
@@ -396,18 +1103,10 @@ class Atomx(object):
         :param kwargs: URL Parameters of the request.
         :return: :class:`dict` with the modified resource.
         """
-        r = requests.put(self.api_endpoint + resource.strip('/') + '/' + str(id),
-                             json=json, params=kwargs, headers=self._auth_header)
-        r_json = r.json()
-        if not r.ok:
-            raise APIError(r_json['error'])
-        model_name = r_json['resource']
-        res = r_json[model_name]
-        if self.save_response:
-            del r_json[model_name]
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
-        return res
+        resource = resource.strip('/') + '/' + str(id)
+        self._invalidate_cache(resource)
+        r = self._send('PUT', resource, json=json, params=kwargs)
+        return self._payload(r)[1]
 
     def delete(self, resource, *args, **kwargs):
         """Send HTTP DELETE to ``resource``.
@@ -418,22 +1117,10 @@ class Atomx(object):
             delete request.
         :return: message or resource returned by the api.
         """
-        if hasattr(resource, '_resource_name') and hasattr(resource, 'id'):
-            resource = '{}/{}'.format(resource._resource_name, resource.id)
-        resource = resource.strip('/')
-        for a in args:
-            resource += '/' + str(a)
-        r = requests.delete(self.api_endpoint + resource, params=kwargs, headers=self._auth_header)
-        r_json = r.json()
-        if not r.ok:
-            raise APIError(r_json['error'])
-        model_name = r_json['resource']
-        res = r_json[model_name]
-        if self.save_response:
-            del r_json[model_name]
-            self.last_response = r_json
-            self.last_response['_headers'] = r.headers
-        return res
+        resource = self._delete_path(resource, args)
+        self._invalidate_cache(resource)
+        r = self._send('DELETE', resource, params=kwargs)
+        return self._payload(r)[1]
 
     def save(self, model):
         """Alias for :meth:`.models.AtomxModel.save` with `session` argument."""
@@ -446,3 +1133,62 @@ class Atomx(object):
     def remove(self, model):
         """Alias for :meth:`.models.AtomxModel.delete` with `session` argument."""
         return model.delete(self)
+
+    def transaction(self, workers=8):
+        """Returns a :class:`atomx.bulk.Transaction` to use as context manager
+        that tracks model changes and flushes them once at the end.
+
+        Example::
+
+            >>> with atomx.transaction() as tx:
+            ...     for campaign in atomx.get('advertiser/1/campaigns'):
+            ...         campaign.budget = campaign.budget * 2
+
+        :param int workers: Maximum number of parallel requests. (default: 8)
+        :return: :class:`atomx.bulk.Transaction`
+        """
+        return bulk.Transaction(self, workers=workers)
+
+    def bulk_create(self, models, workers=8, batch_size=None):
+        """Create many ``models`` at once.
+
+        Example::
+
+            >>> result = atomx.bulk_create([models.Domain(hostname=h) for h in hostnames],
+            ...                            batch_size=100)
+            >>> result.raise_for_errors()
+
+        :param list models: :class:`.models.AtomxModel` to create.
+        :param int workers: Maximum number of parallel requests. (default: 8)
+        :param int batch_size: If set, models of the same resource are created with
+            one `POST` of a list of up to ``batch_size`` models. If a batch fails,
+            all its models are failed. Otherwise each model is `POST` ed on its own.
+            (default: `None`)
+        :return: :class:`atomx.bulk.BulkResult`
+        """
+        return bulk.bulk_create(self, models, workers=workers, batch_size=batch_size)
+
+    def bulk_save(self, models, workers=8):
+        """Save the changes of many ``models`` with parallel requests.
+
+        Only models with changed attributes are sent to the api, the others
+        are in :attr:`atomx.bulk.BulkResult.skipped`.
+
+        :param list models: :class:`.models.AtomxModel` to save.
+        :param int workers: Maximum number of parallel requests. (default: 8)
+        :return: :class:`atomx.bulk.BulkResult`
+        """
+        return bulk.bulk_save(self, models, workers=workers)
+
+    def bulk_delete(self, models, workers=8):
+        """Delete many ``models`` with parallel requests.
+
+        .. warning::
+
+            Calling this method will permanently remove the models from the API.
+
+        :param list models: :class:`.models.AtomxModel` to delete.
+        :param int workers: Maximum number of parallel requests. (default: 8)
+        :return: :class:`atomx.bulk.BulkResult`
+        """
+        return bulk.bulk_delete(self, models, workers=workers)
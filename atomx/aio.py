@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from atomx import _AtomxBase, API_ENDPOINT
+from atomx.exceptions import NoSessionError, ModelNotFoundError, ReportTimeoutError
+
+
+class AsyncAtomx(_AtomxBase):
+    """Asyncio interface for the api on api.atomx.com.
+
+    Has the same methods as :class:`atomx.Atomx` but as coroutines, and
+    returns the same :mod:`atomx.models`.
+    Requests are sent with the session transport in a thread pool, so they never
+    block the event loop, and at most ``max_concurrency`` requests are in flight
+    at the same time.
+
+    Example::
+
+        >>> async with AsyncAtomx('apiuser@example.com', 'password') as atomx:
+        ...     campaigns = await asyncio.gather(*[atomx.get('campaign', campaign_id)
+        ...                                        for campaign_id in campaign_ids])
+        ...     campaigns[0].budget = 100
+        ...     await campaigns[0].asave()
+
+    Models of an :class:`.AsyncAtomx` session can't lazy load missing attributes
+    since that would block the event loop. Use :meth:`.AtomxModel.areload` or
+    ``await atomx.get(model, attribute)`` instead.
+
+    :param str email: email address of your atomx user.
+        If set, the session logs in when used as ``async with`` context manager,
+        otherwise call :meth:`login` yourself.
+    :param str password:  password of your atomx user
+    :param str totp: 6 digit auth token if the account has 2-factor authentication enabled.
+    :param str api_endpoint: url for connections to the api
+        (defaults to `https://api.atomx.com/{API_VERSION}`)
+    :param bool save_response: If `True` save the last api response meta info
+        (without the resource payload) in :attr:`.AsyncAtomx.last_response`. (default: `True`)
+    :param int expiration: Number of seconds that the auth token should be valid. (optional)
+    :param transport: Object that sends the HTTP requests.
+        (defaults to a pooled :class:`atomx.transport.RequestsTransport`)
+    :param int max_concurrency: Maximum number of concurrent api requests. (default: 10)
+    :param concurrent.futures.Executor executor: Executor that runs the requests.
+        (defaults to a thread pool with ``max_concurrency`` threads)
+    :param model_cache: :class:`atomx.cache.ModelCache` to cache models of this session in.
+        (default: `None`)
+    :param retry: :class:`atomx.transport.RetryPolicy` for throttled and failed requests.
+        See :class:`atomx.Atomx`. (default: `True`)
+    :param rate_limiter: :class:`atomx.transport.RateLimiter` to limit the request rate.
+        (default: `None`)
+    :param circuit_breaker: :class:`atomx.transport.CircuitBreaker` that stops sending
+        requests while the api keeps failing. (default: `None`)
+    :param stats: :class:`atomx.stats.Stats` to record request timings in.
+        See :class:`atomx.Atomx`. (default: `None`)
+    :param response_cache: :class:`atomx.cache.ResponseCache` to revalidate `GET` requests.
+        See :class:`atomx.Atomx`. (default: `None`)
+    :return: :class:`.AsyncAtomx` session to interact with the api
+    """
+    _is_async = True
+
+    def __init__(self, email=None, password=None, totp=None,
+                 api_endpoint=API_ENDPOINT, save_response=True, expiration=None,
+                 transport=None, max_concurrency=10, executor=None, model_cache=None,
+                 retry=True, rate_limiter=None, circuit_breaker=None, stats=None,
+                 response_cache=None):
+        super(AsyncAtomx, self).__init__(api_endpoint=api_endpoint, save_response=save_response,
+                                         transport=transport, pool_maxsize=max_concurrency,
+                                         model_cache=model_cache, retry=retry,
+                                         rate_limiter=rate_limiter,
+                                         circuit_breaker=circuit_breaker, stats=stats,
+                                         response_cache=response_cache)
+        self._credentials = (email, password, totp, expiration)
+        self.max_concurrency = max_concurrency
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_concurrency)
+        self._semaphore = None
+
+    async def __aenter__(self):
+        if self.auth_token is None and self._credentials[0]:
+            await self.login()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close all connections of the session transport."""
+        super(AsyncAtomx, self).close()
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def _request(self, method, resource, decode, **kwargs):
+        """Send a HTTP ``method`` request to ``resource`` and ``decode`` the response.
+
+        Both run in the executor so neither the network nor json decoding
+        and model construction block the event loop.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        def call():
+            return decode(self._send(method, resource, **kwargs))
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def login(self, email=None, password=None, totp=None, expiration=None):
+        """Gets new authentication token for user ``email``.
+        See :meth:`atomx.Atomx.login`.
+
+        If ``email`` is not set, the credentials passed to :class:`.AsyncAtomx` are used.
+        """
+        if email is None:
+            email, password, totp, expiration = self._credentials
+        await self._request('POST', 'login', self._login_result,
+                            json=self._login_json(email, password, totp, expiration))
+
+    async def search(self, query, index=None):
+        """Search for ``query``. See :meth:`atomx.Atomx.search`."""
+        return await self._request('GET', 'search', self._search_result,
+                                   params=self._search_params(query, index))
+
+    async def report(self, *args, **kwargs):
+        """Create a report. See :meth:`atomx.Atomx.report` for the parameters."""
+        params, report_json = self._report_request(*args, **kwargs)
+        return await self._request('POST', 'report', self._report_result,
+                                   params=params, json=report_json)
+
+    async def get(self, resource, *args, **kwargs):
+        """Get a model or list of models. See :meth:`atomx.Atomx.get`."""
+        resource = self._resource_path(resource, args)
+        cached = self._cached_model(resource, kwargs)
+        if cached is not None:
+            return cached
+        conditional = self._conditional_request(resource, kwargs)
+        if conditional is not None:
+            key, cached, headers = conditional
+            return (await self._request(
+                'GET', resource, partial(self._conditional_result, resource, kwargs, key, cached,
+                                         cache='attributes' not in kwargs),
+                params=kwargs, headers=headers))[0]
+        return await self._request('GET', resource,
+                                   partial(self._get_result, cache='attributes' not in kwargs),
+                                   params=kwargs)
+
+    async def post(self, resource, json, **kwargs):
+        """Send HTTP POST to ``resource`` with ``json`` content. See :meth:`atomx.Atomx.post`."""
+        return await self._request('POST', resource.strip('/'), self._post_result,
+                                   json=json, params=kwargs)
+
+    async def put(self, resource, id, json, **kwargs):
+        """Send HTTP PUT to ``resource``/``id`` with ``json`` content.
+        See :meth:`atomx.Atomx.put`.
+        """
+        resource = resource.strip('/') + '/' + str(id)
+        self._invalidate_cache(resource)
+        return await self._request('PUT', resource, lambda r: self._payload(r)[1],
+                                   json=json, params=kwargs)
+
+    async def delete(self, resource, *args, **kwargs):
+        """Send HTTP DELETE to ``resource``. See :meth:`atomx.Atomx.delete`."""
+        resource = self._delete_path(resource, args)
+        self._invalidate_cache(resource)
+        return await self._request('DELETE', resource, lambda r: self._payload(r)[1],
+                                   params=kwargs)
+
+    async def save(self, model):
+        """Alias for :meth:`.models.AtomxModel.asave` with `session` argument."""
+        return await model.asave(self)
+
+    async def create(self, model):
+        """Alias for :meth:`.models.AtomxModel.acreate` with `session` argument."""
+        return await model.acreate(self)
+
+    async def remove(self, model):
+        """Alias for :meth:`.models.AtomxModel.adelete` with `session` argument."""
+        return await model.adelete(self)
+
+
+# Coroutine implementations of the :class:`atomx.models.AtomxModel` api methods.
+
+def _session(model, session):
+    session = session or model.session
+    if not session:
+        raise NoSessionError
+    return session
+
+
+async def _create(model, session=None):
+    session = _session(model, session)
+    res = await session.post(model._resource_name, json=model._create_json)
+    model.__init__(session=session, **res)
+    return model
+
+
+async def _save(model, session=None):
+    session = _session(model, session)
+    res = await session.put(model._resource_name, model.id, json=model._dirty_json)
+    model.__init__(session=session, **res)
+    return model
+
+
+async def _delete(model, session=None):
+    session = _session(model, session)
+    res = await session.delete(model._resource_name, model.id)
+    model._attributes['deleted'] = True
+    return res
+
+
+async def _reload(model, session=None, **kwargs):
+    session = _session(model, session)
+    if 'id' not in model._attributes:
+        raise ModelNotFoundError("Can't reload without 'id' parameter. "
+                                 "Forgot to save() first?")
+    res = await session.get(model._resource_name, model.id, **kwargs)
+    model.__init__(session=session, **res.json)
+    return model
+
+
+async def _history(model, session=None, offset=0, limit=100, sort='date.asc'):
+    session = _session(model, session)
+    if 'id' not in model._attributes:
+        raise ModelNotFoundError("Can't reload without 'id' parameter. "
+                                 "Forgot to save() first?")
+    return await session.get('history', model._resource_name, model.id,
+                             offset=offset, limit=limit, sort=sort)
+
+
+async def _wait_report(report, timeout=None, session=None):
+    session = session or report.session
+    if not session:
+        raise NoSessionError
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def set_result(report, error):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(report)
+
+    def callback(report, error):
+        loop.call_soon_threadsafe(set_result, report, error)
+
+    session.report_poller.add(report, callback)
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        session.report_poller.discard(report, callback)
+        raise ReportTimeoutError('Report {} not ready after {} seconds.'.format(
+            report.id, timeout))
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from atomx.models import AtomxModel
+
+
+class BulkResult(object):
+    """Result of :meth:`atomx.Atomx.bulk_create`, :meth:`atomx.Atomx.bulk_save`
+    and :meth:`atomx.Atomx.bulk_delete`.
+
+    A failing model doesn't abort the whole batch, its error is recorded
+    in :attr:`failed` instead.
+    """
+    def __init__(self):
+        #: Models that were processed successfully
+        self.succeeded = []
+        #: List of ``(model, exception)`` for models that failed
+        self.failed = []
+        #: Models that were skipped because there was nothing to do (e.g. unchanged models)
+        self.skipped = []
+
+    def __repr__(self):
+        return 'BulkResult(succeeded={}, failed={}, skipped={})'.format(
+            len(self.succeeded), len(self.failed), len(self.skipped))
+
+    def __bool__(self):
+        return not self.failed
+    __nonzero__ = __bool__  # py2
+
+    def __len__(self):
+        return len(self.succeeded) + len(self.failed) + len(self.skipped)
+
+    def raise_for_errors(self):
+        """Raise the exception of the first failed model if there is one."""
+        if self.failed:
+            raise self.failed[0][1]
+
+
+def _run(models, call, workers, result):
+    """Call ``call(model)`` for all ``models`` with up to ``workers`` threads
+    and record the outcome per model in ``result``.
+    """
+    def run(model):
+        try:
+            call(model)
+            return model, None
+        except Exception as e:
+            return model, e
+
+    if not models:
+        return result
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(models)))) as executor:
+        for model, error in executor.map(run, models):
+            if error is None:
+                result.succeeded.append(model)
+            else:
+                result.failed.append((model, error))
+    return result
+
+
+def _by_resource(models):
+    """Returns an :class:`~collections.OrderedDict` of ``models`` by their `_resource_name`."""
+    groups = OrderedDict()
+    for model in models:
+        groups.setdefault(model._resource_name, []).append(model)
+    return groups
+
+
+def bulk_create(session, models, workers=8, batch_size=None):
+    """`POST` all ``models``. See :meth:`atomx.Atomx.bulk_create`."""
+    result = BulkResult()
+    if not batch_size:
+        return _run(list(models), lambda model: model.create(session), workers, result)
+
+    def create_batch(batch):
+        created = session.post(batch[0]._resource_name, json=[m._create_json for m in batch])
+        if not isinstance(created, list) or len(created) != len(batch):
+            raise ValueError('Expected a list of {} models from the api.'.format(len(batch)))
+        for model, new in zip(batch, created):
+            model.__init__(session=session, **new.json)
+
+    batches = []
+    for resource_models in _by_resource(models).values():
+        batches += [resource_models[i:i + batch_size]
+                    for i in range(0, len(resource_models), batch_size)]
+    batch_result = _run(batches, create_batch, workers, BulkResult())
+    for batch in batch_result.succeeded:
+        result.succeeded.extend(batch)
+    for batch, error in batch_result.failed:
+        result.failed.extend((model, error) for model in batch)
+    return result
+
+
+def bulk_save(session, models, workers=8):
+    """`PUT` the changed attributes of all ``models``. See :meth:`atomx.Atomx.bulk_save`."""
+    result = BulkResult()
+    dirty = []
+    for resource_models in _by_resource(models).values():
+        for model in resource_models:
+            (dirty if model._dirty else result.skipped).append(model)
+    return _run(dirty, lambda model: model.save(session), workers, result)
+
+
+def bulk_delete(session, models, workers=8):
+    """`DELETE` all ``models``. See :meth:`atomx.Atomx.bulk_delete`."""
+    return _run(list(models), lambda model: model.delete(session), workers, BulkResult())
+
+
+def _new_dependencies(model):
+    """Returns the models without `id` that ``model`` references in its attributes."""
+    dependencies = []
+    for value in model._attributes.values():
+        for item in value if isinstance(value, (list, set, tuple)) else [value]:
+            if isinstance(item, AtomxModel) and item._attributes.get('id') is None:
+                dependencies.append(item)
+    return dependencies
+
+
+class Transaction(object):
+    """Unit of work that collects model changes and flushes them at once.
+
+    Use it with :meth:`atomx.Atomx.transaction`::
+
+        >>> with atomx.transaction() as tx:
+        ...     profile = tx.create(models.Profile(advertiser_id=1, name='profile'))
+        ...     tx.create(models.Campaign(advertiser_id=1, name='campaign', profile=profile))
+        ...     for campaign in atomx.get('advertiser/1/campaigns'):
+        ...         campaign.budget = campaign.budget * 2
+        ...         campaign.budget += 10  # still only one `PUT` per campaign
+
+    While the transaction is active, all models the session loads are tracked.
+    Other models can be added with :meth:`add`. On exit (without exception)
+    :meth:`flush` sends
+
+    1. a `POST` for every model added with :meth:`create`, models referenced
+       by other new models first,
+    2. one `PUT` with the changed attributes of each changed model. Changes to
+       different instances of the same model are merged, later tracked
+       instances win on conflicting attributes,
+    3. a `DELETE` for every model added with :meth:`delete`.
+
+    The requests of each step run in parallel. The api has no transactions,
+    so if a request fails the others are still sent and the first error is
+    raised after the flush. If the ``with`` block raises, nothing is sent.
+
+    :param session: :class:`atomx.Atomx` session.
+    :param int workers: Maximum number of parallel requests. (default: 8)
+    """
+    def __init__(self, session, workers=8):
+        self.session = session
+        self.workers = workers
+        #: :class:`BulkResult` of the last :meth:`flush`
+        self.result = None
+        self._models = OrderedDict()
+        self._new = []
+        self._deleted = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.session._transaction is not None:
+            raise RuntimeError('The session already has an active transaction.')
+        self.session._transaction = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.session._transaction = None
+        if exc_type is None:
+            self.flush().raise_for_errors()
+
+    def add(self, *models):
+        """Track the changes of ``models``."""
+        with self._lock:
+            for model in models:
+                id = model._attributes.get('id')
+                if id is None:
+                    if not any(m is model for m in self._new):
+                        self._new.append(model)
+                    continue
+                instances = self._models.setdefault((model._resource_name, str(id)), [])
+                if not any(m is model for m in instances):
+                    instances.append(model)
+
+    def create(self, model):
+        """Create ``model`` on :meth:`flush`.
+
+        :return: ``model``, so it can be referenced by other new models.
+        """
+        self.add(model)
+        return model
+
+    def delete(self, model):
+        """Delete ``model`` on :meth:`flush`."""
+        with self._lock:
+            self._deleted[(model._resource_name, str(model.id))] = model
+
+    def flush(self):
+        """Send all tracked changes to the api.
+
+        :return: :class:`BulkResult` with the created, saved and deleted models.
+        """
+        with self._lock:
+            new, self._new = self._new, []
+            deleted, self._deleted = self._deleted, OrderedDict()
+        result = BulkResult()
+        self._flush_new(new, result)
+
+        updates = []
+        for key, instances in list(self._models.items()):
+            if key in deleted:
+                continue
+            dirty = {}
+            for model in instances:
+                dirty.update(model._dirty_json)
+            if dirty:
+                updates.append((key, instances, dirty))
+
+        def put(update):
+            key, instances, dirty = update
+            res = self.session.put(key[0], key[1], json=dirty)
+            for model in instances:
+                model.__init__(session=self.session, **res)
+
+        self._merge(_run(updates, put, self.workers, BulkResult()), result,
+                    lambda update: update[1][0])
+        _run(list(deleted.values()), lambda model: model.delete(self.session),
+             self.workers, result)
+        for key in deleted:
+            self._models.pop(key, None)
+        self.result = result
+        return result
+
+    def _flush_new(self, new, result):
+        """Create the ``new`` models, the models they reference first."""
+        pending = list(new)
+        for model in pending:  # also create new models only referenced by other new models
+            for dependency in _new_dependencies(model):
+                if not any(m is dependency for m in pending):
+                    pending.append(dependency)
+
+        failed = []
+        while pending:
+            ready, waiting = [], []
+            for model in pending:
+                dependencies = _new_dependencies(model)
+                if any(d is f for d in dependencies for f in failed):
+                    result.failed.append((model, ValueError(
+                        'A model that {!r} references could not be created.'.format(model))))
+                    failed.append(model)
+                elif dependencies:
+                    waiting.append(model)
+                else:
+                    ready.append(model)
+            if not ready:
+                for model in waiting:
+                    result.failed.append((model, ValueError(
+                        'Circular reference between new models.')))
+                return
+            level = _run(ready, lambda model: model.create(self.session),
+                         self.workers, BulkResult())
+            result.succeeded.extend(level.succeeded)
+            result.failed.extend(level.failed)
+            failed.extend(model for model, _ in level.failed)
+            self.add(*level.succeeded)
+            pending = waiting
+
+    @staticmethod
+    def _merge(source, result, model):
+        result.succeeded.extend(model(item) for item in source.succeeded)
+        result.failed.extend((model(item), error) for item, error in source.failed)
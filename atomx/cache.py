@@ -0,0 +1,555 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+try:  # py3
+    from time import monotonic as _now
+except ImportError:  # py2
+    from time import time as _now
+try:  # py3
+    from urllib.parse import urlencode
+except ImportError:  # py2
+    from urllib import urlencode
+
+from atomx.utils import current_hour, utcnow
+
+
+class ModelCache(object):
+    """Identity map for :mod:`atomx.models` of a session.
+
+    Models are cached by ``(_resource_name, id)`` so :meth:`atomx.Atomx.get`
+    for a single model and lazy loaded attributes (e.g. ``campaign.country``)
+    return the cached instance instead of making an api request.
+
+    Each resource has its own time to live. Rarely changing reference data
+    like countries or browsers is cached long, everything else only shortly.
+    When more than ``maxsize`` models are cached, the least recently used
+    ones are removed. Models are removed from the cache when they are changed
+    or deleted with the session.
+
+    Example::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password',
+        ...               model_cache=ModelCache(ttls={'campaign': 10}))
+        >>> atomx.get('country', 42)
+        >>> atomx.get('country', 42)  # no api request
+        >>> atomx.model_cache.stats()
+        {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+
+    :param int maxsize: Maximum number of cached models. (default: 10000)
+    :param float ttl: Seconds a model of a resource not in ``ttls`` stays cached.
+        `None` to cache forever. (default: 60)
+    :param dict ttls: Seconds a model stays cached by resource name (e.g. ``'country'``).
+        Updates :attr:`DEFAULT_TTLS`. A ttl of ``0`` disables caching for the resource.
+    """
+    #: Default time to live in seconds per resource
+    DEFAULT_TTLS = dict(
+        [(resource, 24 * 3600) for resource in (
+            'appstore', 'browser', 'category', 'city', 'connection-type', 'country',
+            'creative-attribute', 'datacenter', 'device-type', 'dma', 'isp', 'languages',
+            'operating-system', 'placement-type', 'price-model', 'reason', 'size',
+            'ssp-result-type', 'timezone', 'visibility', 'zipcode',
+        )] +
+        [(resource, 10) for resource in (
+            'campaign', 'creative', 'profile',
+        )]
+    )
+
+    def __init__(self, maxsize=10000, ttl=60, ttls=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+        #: Number of lookups that returned a cached model
+        self.hits = 0
+        #: Number of lookups that didn't find a (fresh) model
+        self.misses = 0
+        #: Number of models removed because the cache was full
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, resource, id):
+        """Returns the cached model of ``resource`` with ``id`` or `None`."""
+        key = (resource, str(id))
+        with self._lock:
+            entry = self._models.pop(key, None)
+            if entry is None or (entry[0] is not None and entry[0] < _now()):
+                self.misses += 1
+                return None
+            self._models[key] = entry  # move to the end as most recently used
+            self.hits += 1
+            return entry[1]
+
+    def add(self, model):
+        """Add ``model`` to the cache (if it has an `id`)."""
+        id = model._attributes.get('id')
+        resource = model._resource_name
+        ttl = self.ttls.get(resource, self.ttl)
+        if id is None or ttl == 0:
+            return
+        key = (resource, str(id))
+        with self._lock:
+            self._models.pop(key, None)
+            self._models[key] = (_now() + ttl if ttl is not None else None, model)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, resource, id=None):
+        """Remove the model with ``id`` or all models of ``resource`` from the cache."""
+        with self._lock:
+            if id is not None:
+                self._models.pop((resource, str(id)), None)
+            else:
+                for key in [k for k in self._models if k[0] == resource]:
+                    del self._models[key]
+
+    def clear(self):
+        """Remove all models from the cache."""
+        with self._lock:
+            self._models.clear()
+
+    def stats(self):
+        """Returns a :class:`dict` with the number of `hits`, `misses`, `evictions`
+        and the current `size` of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._models)}
+
+
+class DiskCache(object):
+    """Persistent cache for the api responses of rarely changing resources.
+
+    Responses of :meth:`atomx.Atomx.get` (and :meth:`atomx.Atomx.iter`) requests
+    for ``resources`` are stored zlib compressed in a sqlite database, keyed by
+    the request url and parameters. A cached response is used without request
+    for ``max_age`` seconds. After that it is revalidated with
+    `If-None-Match`/`If-Modified-Since` if the api sent an `ETag`/`Last-Modified`
+    header, so unchanged data doesn't have to be downloaded again.
+
+    The database can be shared by multiple processes (e.g. all workers on a host)
+    and the cached data isn't user specific, so only use it for public reference data.
+
+    Example::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password',
+        ...               disk_cache=DiskCache('/var/cache/atomx.sqlite'))
+        >>> countries = atomx.get('countries')  # only requested once per `max_age`
+
+    :param str path: Path of the sqlite database file.
+    :param resources: Resource names (e.g. ``'country'``) of the responses to cache.
+        (defaults to :attr:`DEFAULT_RESOURCES`)
+    :param float max_age: Seconds a response is used without revalidation.
+        `None` to revalidate every time. (default: 3600)
+    """
+    #: Resources that are cached by default
+    DEFAULT_RESOURCES = ('browser', 'city', 'country', 'dma', 'isp',
+                         'operating-system', 'zipcode')
+
+    def __init__(self, path, resources=DEFAULT_RESOURCES, max_age=3600):
+        self.path = path
+        self.resources = frozenset(resources)
+        self.max_age = max_age
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                       'key TEXT PRIMARY KEY, content BLOB, etag TEXT, '
+                       'last_modified TEXT, stored_at REAL)')
+
+    def _connection(self):
+        """Returns the sqlite connection of the current thread."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    def get(self, key):
+        """Returns the :class:`CachedResponse` for ``key`` or `None`."""
+        row = self._connection().execute(
+            'SELECT content, etag, last_modified, stored_at FROM responses WHERE key = ?',
+            (key,)).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(zlib.decompress(row[0]), row[1], row[2], row[3])
+
+    def set(self, key, content, etag=None, last_modified=None):
+        """Store the response ``content`` with its validators for ``key``."""
+        with self._connection() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                       (key, sqlite3.Binary(zlib.compress(content)),
+                        etag, last_modified, time.time()))
+
+    def touch(self, key):
+        """Mark the response for ``key`` as fresh after it got revalidated."""
+        with self._connection() as db:
+            db.execute('UPDATE responses SET stored_at = ? WHERE key = ?', (time.time(), key))
+
+    def is_fresh(self, response):
+        """Returns `True` if the :class:`CachedResponse` can be used without revalidation."""
+        return self.max_age is not None and time.time() - response.stored_at < self.max_age
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._connection() as db:
+            db.execute('DELETE FROM responses')
+
+
+class _Validated(object):
+    __slots__ = ('etag', 'last_modified', 'result', 'models', 'meta')
+
+    def __init__(self, etag, last_modified, result, meta):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.result = result
+        self.models = [m for m in (result if isinstance(result, list) else [result])
+                       if hasattr(m, '_dirty')]
+        self.meta = meta
+
+    def headers(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """In memory cache for conditional `GET` requests of a session.
+
+    The decoded models of responses with an `ETag` or `Last-Modified` header
+    are kept together with these validators, keyed by the resource path and
+    URL parameters. The next :meth:`atomx.Atomx.get` (or :meth:`atomx.Atomx.iter` page)
+    of the same url sends `If-None-Match`/`If-Modified-Since` and if the api
+    answers `304 Not Modified` the cached models are returned without
+    downloading and decoding the response again.
+
+    The same model instances are returned for unchanged responses. A response
+    with a model that has unsaved changes is requested again without validators.
+
+    In contrast to :class:`DiskCache` every request is revalidated and the models
+    belong to the session, so a :class:`ResponseCache` can't be shared between sessions.
+
+    Example::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password', response_cache=True)
+        >>> campaigns = atomx.get('campaigns')
+        >>> assert atomx.get('campaigns') is campaigns  # if the campaigns didn't change
+        >>> atomx.response_cache.stats()
+        {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'hit_rate': 0.5}
+
+    :param int maxsize: Maximum number of responses to keep. (default: 100)
+    :param resources: Resource names (e.g. ``'campaign'``) of the responses to cache.
+        `None` for all resources. (default: `None`)
+    """
+    def __init__(self, maxsize=100, resources=None):
+        self.maxsize = maxsize
+        self.resources = frozenset(resources) if resources is not None else None
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+        #: Number of requests answered with `304 Not Modified`
+        self.hits = 0
+        #: Number of requests that returned new data
+        self.misses = 0
+        #: Number of responses removed because the cache was full
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def is_cacheable(self, resource):
+        """Returns `True` if responses of the ``resource`` name are cached."""
+        return self.resources is None or resource in self.resources
+
+    @staticmethod
+    def key(resource, params):
+        """Returns the cache key of a `GET` request for ``resource`` with ``params``."""
+        return resource + '?' + urlencode(sorted(params.items()))
+
+    def get(self, key):
+        """Returns the cached response of ``key`` or `None`.
+
+        Responses with models that have unsaved changes are removed instead.
+        """
+        with self._lock:
+            entry = self._responses.pop(key, None)
+            if entry is None or any(m._dirty for m in entry.models):
+                return None
+            self._responses[key] = entry  # move to the end as most recently used
+            return entry
+
+    def set(self, key, etag, last_modified, result, meta):
+        """Store the decoded ``result`` and ``meta`` info of a response with its validators."""
+        with self._lock:
+            self._responses.pop(key, None)
+            self._responses[key] = _Validated(etag, last_modified, result, meta)
+            while len(self._responses) > self.maxsize:
+                self._responses.popitem(last=False)
+                self.evictions += 1
+
+    def record(self, hit):
+        """Count a response as `hit` (`304 Not Modified`) or miss."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock:
+            self._responses.clear()
+
+    def stats(self):
+        """Returns a :class:`dict` with the number of `hits`, `misses`, `evictions`,
+        the current `size` of the cache and the `hit_rate`.
+        """
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._responses),
+                'hit_rate': float(self.hits) / total if total else 0.0}
+
+
+class _InFlight(object):
+    __slots__ = ('event', 'payload')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.payload = None
+
+
+class ReportCache(object):
+    """Cache for the results of :meth:`atomx.Atomx.report`.
+
+    Reports are cached by their normalized query, so the order of ``groups``,
+    ``metrics`` and ``where`` clauses doesn't matter. A cached report is
+    returned with its columns in the order of the query.
+
+    Reports of a closed time range (``to`` is before the current hour) don't
+    change anymore and are cached for ``ttl`` seconds (default: forever).
+    Reports that include the current hour are only cached for ``recent_ttl`` seconds.
+    Scheduled reports and reports that aren't ready yet are never cached.
+    If the same report is requested by multiple threads at the same time,
+    only one request is sent to the api.
+
+    Example::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password',
+        ...               report_cache=ReportCache('/var/cache/atomx-reports.sqlite'))
+        >>> report = atomx.report(groups=['site_id'], metrics=['impressions'],
+        ...                       from_=datetime(2016, 1, 1), to=datetime(2016, 2, 1))
+        >>> report = atomx.report(groups=['site_id'], metrics=['impressions'],
+        ...                       from_=datetime(2016, 1, 1), to=datetime(2016, 2, 1))
+        >>> atomx.report_cache.stats()
+        {'hits': 1, 'misses': 1, 'shared': 0, 'size': 1}
+
+    :param str path: Path of a sqlite database to store the reports in.
+        Reports are kept in memory if `None`. (default: `None`)
+    :param float ttl: Seconds a report of a closed time range stays cached.
+        `None` to cache forever. (default: `None`)
+    :param float recent_ttl: Seconds a report that includes the current hour
+        stays cached. (default: 60)
+    :param int maxsize: Maximum number of reports kept in memory. (default: 100)
+    """
+    def __init__(self, path=None, ttl=None, recent_ttl=60, maxsize=100):
+        self.path = path
+        self.ttl = ttl
+        self.recent_ttl = recent_ttl
+        self.maxsize = maxsize
+        self._reports = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        #: Number of reports returned from the cache
+        self.hits = 0
+        #: Number of reports requested from the api
+        self.misses = 0
+        #: Number of reports that waited for the identical request of another thread
+        self.shared = 0
+        if path is not None:
+            with self._connection() as db:
+                db.execute('CREATE TABLE IF NOT EXISTS reports ('
+                           'key TEXT PRIMARY KEY, content BLOB, expires_at REAL)')
+
+    def __len__(self):
+        if self.path is None:
+            return len(self._reports)
+        return self._connection().execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def _connection(self):
+        """Returns the sqlite connection of the current thread."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute('PRAGMA journal_mode=WAL')
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def is_cacheable(report_json):
+        """Returns `True` if the report for ``report_json`` can be cached."""
+        return 'when' not in report_json
+
+    @staticmethod
+    def key(report_json, params=None, namespace=None):
+        """Returns the cache key for a report request.
+
+        :param dict report_json: The report request body.
+        :param dict params: The report request url parameters (`limit`, `offset`, `sort`).
+        :param namespace: Anything that has to be part of the key as well,
+            e.g. api endpoint and user.
+        """
+        query = dict(report_json)
+        for key in ('name', 'emails', 'save', 'editable'):  # don't change the result
+            query.pop(key, None)
+        for key in ('groups', 'metrics'):
+            if key in query:
+                query[key] = sorted(query[key])
+        if 'where' in query:
+            query['where'] = sorted(
+                json.dumps([c[0], c[1], sorted(c[2]) if isinstance(c[2], list) else c[2]])
+                for c in query['where'])
+        if 'daterange' in query:  # rolling reports change with the current hour
+            query['hour'] = utcnow().strftime('%Y-%m-%d %H')
+        content = json.dumps([namespace, params or {}, query], sort_keys=True, default=str)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def report_ttl(self, report_json):
+        """Returns the seconds to cache the report of ``report_json``."""
+        try:
+            to = datetime.strptime(report_json['to'], '%Y-%m-%d %H:00:00')
+        except (KeyError, TypeError, ValueError):
+            return self.recent_ttl
+        if to <= current_hour(report_json.get('timezone', 'UTC')):
+            return self.ttl
+        return self.recent_ttl
+
+    def get(self, key):
+        """Returns the cached report payload for ``key`` or `None`."""
+        if self.path is None:
+            with self._lock:
+                entry = self._reports.pop(key, None)
+                if entry is None or (entry[0] is not None and entry[0] < _now()):
+                    return None
+                self._reports[key] = entry
+                return _copy_report(entry[1])
+        row = self._connection().execute(
+            'SELECT content, expires_at FROM reports WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def set(self, key, payload, ttl=None):
+        """Cache the report ``payload`` for ``key`` for ``ttl`` seconds (`None` for forever)."""
+        if self.path is None:
+            with self._lock:
+                self._reports.pop(key, None)
+                self._reports[key] = (_now() + ttl if ttl is not None else None,
+                                      _copy_report(payload))
+                while len(self._reports) > self.maxsize:
+                    self._reports.popitem(last=False)
+            return
+        content = zlib.compress(json.dumps(payload).encode('utf-8'))
+        with self._connection() as db:
+            db.execute('INSERT OR REPLACE INTO reports VALUES (?, ?, ?)',
+                       (key, sqlite3.Binary(content),
+                        time.time() + ttl if ttl is not None else None))
+
+    def fetch(self, key, load):
+        """Returns the cached report payload for ``key`` or loads and caches it.
+
+        :param str key: Cache key from :meth:`key`.
+        :param load: Function that requests the report and returns the
+            payload and the seconds to cache it (``0`` to not cache it).
+            If another thread is already loading ``key``, its payload is used instead.
+        """
+        payload = self.get(key)
+        if payload is not None:
+            with self._lock:
+                self.hits += 1
+            return payload
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            loading = in_flight is None
+            if loading:
+                in_flight = self._in_flight[key] = _InFlight()
+                self.misses += 1
+        if not loading:
+            in_flight.event.wait()
+            if in_flight.payload is not None:
+                with self._lock:
+                    self.shared += 1
+                return _copy_report(in_flight.payload)
+            return load()[0]  # the other request failed
+        try:
+            payload, ttl = load()
+            if ttl != 0:
+                self.set(key, payload, ttl)
+            in_flight.payload = _copy_report(payload)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.event.set()
+        return payload
+
+    def clear(self):
+        """Remove all cached reports."""
+        with self._lock:
+            self._reports.clear()
+        if self.path is not None:
+            with self._connection() as db:
+                db.execute('DELETE FROM reports')
+
+    def stats(self):
+        """Returns a :class:`dict` with the number of `hits`, `misses`,
+        `shared` requests and the current `size` of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'shared': self.shared, 'size': len(self)}
+
+
+def _copy_report(payload):
+    """Returns a copy of the report ``payload`` that shares no mutable rows with it,
+    so changes to a returned report don't change the cached one.
+    """
+    payload = dict(payload)
+    for key in ('data', 'columns'):
+        if payload.get(key) is not None:
+            payload[key] = [list(row) if isinstance(row, list) else row
+                            for row in payload[key]]
+    for key in ('totals', 'query'):
+        if isinstance(payload.get(key), dict):
+            payload[key] = dict(payload[key])
+    return payload
+
+
+def _project_report(payload, report_json):
+    """Returns the report ``payload`` with its columns in the order of ``report_json``."""
+    columns = payload.get('columns')
+    wanted = list(report_json.get('groups') or []) + list(report_json.get('metrics') or [])
+    if not columns or columns == wanted or sorted(columns) != sorted(wanted):
+        return dict(payload)
+    order = [columns.index(column) for column in wanted]
+    payload = dict(payload, columns=wanted)
+    if isinstance(payload.get('query'), dict):
+        payload['query'] = dict(payload['query'], groups=report_json.get('groups'),
+                                metrics=report_json.get('metrics'))
+    if payload.get('data') is not None:
+        payload['data'] = [[row[i] for i in order] for row in payload['data']]
+    return payload
+
+
+#: A response stored in the :class:`DiskCache`
+CachedResponse = namedtuple('CachedResponse', ['content', 'etag', 'last_modified', 'stored_at'])
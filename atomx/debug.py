@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+import traceback
+import warnings
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+from atomx.exceptions import LazyLoadError, LazyLoadWarning
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+#: A lazy load recorded by the :class:`LazyLoadTracer`
+LazyLoad = namedtuple('LazyLoad', ['model', 'attribute', 'id', 'stack'])
+
+
+def _user_stack(limit):
+    """Returns the last ``limit`` frames of the current stack outside of :mod:`atomx`."""
+    stack = [frame for frame in traceback.extract_stack()[:-1]
+             if not os.path.abspath(frame[0]).startswith(_PACKAGE_DIR)]
+    return [tuple(frame[:4]) for frame in stack[-limit:]]
+
+
+class LazyLoadTracer(object):
+    """Records every attribute that :mod:`atomx.models` lazy load from the api
+    and detects N+1 query patterns.
+
+    Accessing an attribute that isn't loaded yet (e.g. ``campaign.profile``)
+    sends an api request. Doing that in a loop over many models sends one
+    request per model. Pass ``lazy_load_tracer=LazyLoadTracer()`` to
+    :class:`atomx.Atomx` to find those loops::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password',
+        ...               lazy_load_tracer=LazyLoadTracer(mode='warn'))
+        >>> for campaign in atomx.get('campaigns'):
+        ...     campaign.profile  # LazyLoadWarning after `threshold` campaigns
+        >>> atomx.lazy_load_tracer.summary()
+        [('Campaign', 'profile', 100, ('jobs.py', 12, 'main', 'campaign.profile'))]
+
+    Use :meth:`atomx.Atomx.prefetch` or the `attributes` parameter of
+    :meth:`atomx.Atomx.get` to load the attributes in one request instead.
+
+    :param str mode: `'record'` to only record lazy loads, `'warn'` to also issue a
+        :class:`atomx.exceptions.LazyLoadWarning` when the same attribute is lazy
+        loaded for ``threshold`` different models of a class, `'raise'` to raise
+        :class:`atomx.exceptions.LazyLoadError` instead of lazy loading. (default: `'warn'`)
+    :param int threshold: Number of models that lazy load the same attribute
+        until a warning is issued. (default: 10)
+    :param int stack_limit: Number of call stack frames to record per lazy load. (default: 5)
+    :param int maxlen: Maximum number of recorded lazy loads. (default: 10000)
+    """
+    MODES = ('record', 'warn', 'raise')
+
+    def __init__(self, mode='warn', threshold=10, stack_limit=5, maxlen=10000):
+        if mode not in self.MODES:
+            raise ValueError('`mode` has to be one of {}.'.format(', '.join(self.MODES)))
+        self.mode = mode
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        #: Recorded :class:`LazyLoad`
+        self.loads = deque(maxlen=maxlen)
+        self._ids = {}
+        self._warned = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def forbidden(self):
+        """Context manager in which lazy loads of the current thread raise
+        :class:`atomx.exceptions.LazyLoadError`, e.g. to guarantee that a hot loop
+        never sends api requests.
+        """
+        previous = getattr(self._local, 'forbidden', False)
+        self._local.forbidden = True
+        try:
+            yield self
+        finally:
+            self._local.forbidden = previous
+
+    def before_load(self, model, attribute):
+        """Called by :class:`atomx.models.AtomxModel` before ``attribute`` of
+        ``model`` is lazy loaded.
+        """
+        name = model.__class__.__name__
+        id = model._attributes.get('id')
+        if self.mode == 'raise' or getattr(self._local, 'forbidden', False):
+            raise LazyLoadError('Lazy loading `{}.{}` of {} id {} is not allowed. Use '
+                                '`atomx.prefetch()` or the `attributes` parameter to load it '
+                                'upfront.'.format(name, attribute, name, id))
+        stack = _user_stack(self.stack_limit)
+        key = (name, attribute)
+        with self._lock:
+            self.loads.append(LazyLoad(name, attribute, id, stack))
+            ids = self._ids.setdefault(key, set())
+            ids.add(id)
+            warn = (self.mode == 'warn' and len(ids) >= self.threshold and
+                    key not in self._warned)
+            if warn:
+                self._warned.add(key)
+        if warn:
+            call_site = '{}:{}'.format(*stack[-1][:2]) if stack else 'unknown'
+            warnings.warn('`{}.{}` was lazy loaded for {} different models (last from {}). '
+                          'Use `atomx.prefetch()` to load it with one request.'.format(
+                              name, attribute, len(ids), call_site),
+                          LazyLoadWarning, stacklevel=3)
+
+    def summary(self):
+        """Returns ``(model, attribute, count, call_site)`` tuples of the recorded
+        lazy loads, most frequent first. ``call_site`` is the most frequent
+        ``(filename, line, function, code)`` that triggered them.
+        """
+        with self._lock:
+            loads = list(self.loads)
+        groups = {}
+        for load in loads:
+            sites = groups.setdefault((load.model, load.attribute), {})
+            site = load.stack[-1] if load.stack else None
+            sites[site] = sites.get(site, 0) + 1
+        result = [(model, attribute, sum(sites.values()), max(sites, key=sites.get))
+                  for (model, attribute), sites in groups.items()]
+        return sorted(result, key=lambda r: -r[2])
+
+    def clear(self):
+        """Remove all recorded lazy loads."""
+        with self._lock:
+            self.loads.clear()
+            self._ids.clear()
+            self._warned.clear()
@@ -12,6 +12,12 @@ class APIError(Exception):
     """Raised when the atomx api returns an error that is not caught otherwise."""
     pass
 
+class CircuitOpenError(APIError):
+    """Raised instead of sending a request while the :class:`atomx.transport.CircuitBreaker`
+    of the session is open because the api kept failing.
+    """
+    pass
+
 class MissingArgumentError(Exception):
     """Raised when argument is missing."""
     pass
@@ -20,6 +26,30 @@ class ModelNotFoundError(Exception):
     """Raised when trying to (re-)load a model that is not in the api."""
     pass
 
+class ReportTimeoutError(Exception):
+    """Raised when a report isn't ready within the timeout of :meth:`.models.Report.wait`."""
+    pass
+
+class LazyLoadError(Exception):
+    """Raised by the :class:`atomx.debug.LazyLoadTracer` instead of lazy loading
+    a model attribute when lazy loading is forbidden.
+    """
+    pass
+
+class LazyLoadWarning(UserWarning):
+    """Issued by the :class:`atomx.debug.LazyLoadTracer` when the same attribute is
+    lazy loaded for many models (N+1 requests).
+    """
+    pass
+
 class NoPandasInstalledError(Exception):
     """Raised when trying to access ``report.pandas`` without :mod:`pandas` installed."""
     pass
+
+class NoNumpyInstalledError(Exception):
+    """Raised when trying to get a report as :mod:`numpy` arrays without :mod:`numpy` installed."""
+    pass
+
+class NoPyArrowInstalledError(Exception):
+    """Raised when trying to get a report as arrow table without :mod:`pyarrow` installed."""
+    pass
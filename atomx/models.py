@@ -1,18 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import csv
 import pprint
+from collections import OrderedDict
 from decimal import Decimal
 from datetime import datetime, date
 try:  # py3
     from io import StringIO
 except ImportError:  # py2
     from StringIO import StringIO
-from atomx.utils import _class_property
+from atomx.utils import _class_property, get_attribute_model
 from atomx.exceptions import (
     NoSessionError,
     ModelNotFoundError,
     APIError,
     NoPandasInstalledError,
+    NoNumpyInstalledError,
+    NoPyArrowInstalledError,
 )
 
 # pylint: disable=undefined-all-variable
@@ -25,59 +29,139 @@ __all__ = ['AccountManager', 'Advertiser', 'App', 'Appstore', 'Bidder', 'Browser
            'SspSuspicious', 'Timezone', 'User', 'Visibility', 'Zipcode']  # noqa
 
 
+_NOT_DIRTY = frozenset()
+
+try:  # py2
+    string_types = basestring
+except NameError:  # py3
+    string_types = str
+
+_fromisoformat = getattr(datetime, 'fromisoformat', None)  # py3.7+
+
+
+def _parse_date(key, value):
+    """Convert the string ``value`` of the attribute ``key`` (`*_at` or `date`)
+    to :class:`datetime.datetime`. Returns `None` if ``value`` isn't a valid date.
+    """
+    if key == 'date':
+        length, fmt = 10, '%Y-%m-%d'
+    else:
+        length, fmt = 19, '%Y-%m-%dT%H:%M:%S'
+    try:
+        if _fromisoformat and len(value) == length and value[4] == '-' and \
+                (length == 10 or value[10] == 'T'):
+            return _fromisoformat(value)
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+def _json_value(val):
+    """Convert the attribute value ``val`` to a json serializable value.
+    Models are replaced by their `id`.
+    """
+    if isinstance(val, AtomxModel):
+        return val._attributes.get('id')
+    elif isinstance(val, datetime) or isinstance(val, date):
+        return val.isoformat()
+    elif isinstance(val, Decimal):
+        return float(val)
+    elif isinstance(val, (list, set, tuple)):
+        return [_json_value(v) for v in val]
+    return val
+
+
 class AtomxModel(object):
     """A generic atomx model that the other models from :mod:`atomx.models` inherit from.
 
+    Models use ``__slots__`` and only create the set of changed attributes once an
+    attribute is changed, to keep large result sets (e.g. 300k domains) small in memory.
+
     :param int id: Optional model ID. Can also be passed in via `attributes` as `id`.
     :param atomx.Atomx session: The :class:`atomx.Atomx` session to use for the api requests.
     :param attributes: model attributes
     """
-    def __init__(self, id=None, session=None, **attributes):
-        from atomx.utils import get_attribute_model_name
-        for k, v in attributes.items():
-            if k.endswith('_at'):
-                try:
-                    attributes[k] = datetime.strptime(v, '%Y-%m-%dT%H:%M:%S')
-                except (ValueError, TypeError):
-                    pass
-            elif k == 'date':
-                try:
-                    attributes[k] = datetime.strptime(v, '%Y-%m-%d')
-                except (ValueError, TypeError):
-                    pass
+    __slots__ = ('session', '_attributes', '_dirty', '_partial')
 
+    def __init__(self, id=None, session=None, **attributes):
+        # dates (`*_at` and `date` attributes) are kept as string
+        # and only converted to datetime once they are accessed
         if id is not None:
             attributes['id'] = id
 
         super(AtomxModel, self).__setattr__('session', session)
         super(AtomxModel, self).__setattr__('_attributes', attributes)
-        super(AtomxModel, self).__setattr__('_dirty', set())  # list of changed attributes
+        # set of changed attributes (shared empty frozenset until the first change)
+        super(AtomxModel, self).__setattr__('_dirty', _NOT_DIRTY)
+        # :class:`atomx.query._PartialGroup` if only some attributes are loaded
+        super(AtomxModel, self).__setattr__('_partial', None)
 
     def __getattr__(self, item):
-        from atomx.utils import get_attribute_model_name
-        model_name = get_attribute_model_name(item)
         attr = self._attributes.get(item)
+        if isinstance(attr, string_types) and (item.endswith('_at') or item == 'date'):
+            parsed = _parse_date(item, attr)
+            if parsed is not None:
+                self._attributes[item] = parsed
+                return parsed
+
+        Model = get_attribute_model(item)
+
+        # models of an async session can't lazy load attributes without blocking
+        is_async = getattr(self.session, '_is_async', False)
+
+        # use cached models of the session for attributes that reference models by id
+        cache = getattr(self.session, 'model_cache', None)
+        if Model and cache is not None and (isinstance(attr, int) or
+                                            isinstance(attr, list) and len(attr) > 0 and
+                                            isinstance(attr[0], int)):
+            resource = Model._resource_name
+            cached = [cache.get(resource, i) for i in (attr if isinstance(attr, list) else [attr])]
+            if all(c is not None for c in cached):
+                transaction = getattr(self.session, '_transaction', None)
+                if transaction is not None:
+                    transaction.add(*cached)
+                self._attributes[item] = cached if isinstance(attr, list) else cached[0]
+                return self._attributes[item]
 
         # if requested attribute item is a valid model name and and int or
-        # a list of integers, just delete the attribute so it gets
-        # fetched from the api
-        if model_name and (isinstance(attr, int) or
-                           isinstance(attr, list) and len(attr) > 0 and
-                           isinstance(attr[0], int)):
-            del self._attributes[item]
-        elif model_name:
-            Model = globals()[model_name]
+        # a list of integers, fetch the referenced models from the api
+        reference = Model and (isinstance(attr, int) or
+                               isinstance(attr, list) and len(attr) > 0 and
+                               isinstance(attr[0], int))
+        if Model and not reference:
             if isinstance(attr, list) and len(attr) > 0 and isinstance(attr[0], dict):
                 return [Model(session=self.session, **a) for a in attr]
             elif isinstance(attr, dict):
                 return Model(session=self.session, **attr)
+        missing = reference or item not in self._attributes
+
+        # partial models load all missing attributes of their query result at once
+        partial = self._partial
+        if partial is not None and not item.startswith('_') and missing \
+                and item not in partial.fields and not is_async:
+            partial.load()
+            if item in self._attributes:
+                return getattr(self, item)
 
         # if item not in model and session exists,
         # try to load model attribute from server if possible
-        if not item.startswith('_') and item not in self._attributes and self.session:
+        if not item.startswith('_') and missing and self.session:
             # loading of extra data is only possible if model ID is known
             if 'id' not in self._attributes:
                 raise AttributeError('Model needs at least an `id` value to load more attributes.')
+            if is_async and reference:
+                raise AttributeError("Can't lazy load `{0}` with an async session. "
+                                     "Use `await atomx.get(model, '{0}')` instead.".format(item))
+            if is_async:
+                raise AttributeError("Can't lazy load `{}` with an async session. "
+                                     "Use `await model.areload()` first.".format(item))
+            # check before changing the model, a refused load leaves it untouched
+            tracer = getattr(self.session, 'lazy_load_tracer', None)
+            if tracer is not None:
+                tracer.before_load(self, item)
+            stats = getattr(self.session, 'stats', None)
+            if stats is not None:
+                stats.record_lazy_load(self.__class__.__name__, item)
             try:
                 v = self.session.get(self.__class__._resource_name, self.id, item)
                 self._attributes[item] = v
@@ -88,18 +172,30 @@ class AtomxModel(object):
     def __setattr__(self, key, value):
         if self._attributes.get(key) != value:
             self._attributes[key] = value
-            self._dirty.add(key)
+            self._mark_dirty(key)
 
     def __delattr__(self, item):
-        if item in self._dirty:
-            self._dirty.remove(item)
-
         self._attributes[item] = [] if isinstance(self._attributes[item], list) else None
+        self._mark_dirty(item)
+
+    def _set_partial(self, group):
+        super(AtomxModel, self).__setattr__('_partial', group)
+
+    @property
+    def is_partial(self):
+        """`True` if only some attributes of the model are loaded
+        (e.g. from :meth:`atomx.Atomx.query` with :meth:`atomx.query.Query.only`).
+        """
+        return self._partial is not None
+
+    def _mark_dirty(self, item):
+        if self._dirty is _NOT_DIRTY:
+            super(AtomxModel, self).__setattr__('_dirty', set())
         self._dirty.add(item)
 
     def __dir__(self):
         """Manually add dynamic attributes for autocomplete"""
-        return dir(type(self)) + list(self.__dict__.keys()) + list(self._attributes.keys())
+        return dir(type(self)) + list(self._attributes.keys())
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, pprint.pformat(self.json))
@@ -120,24 +216,22 @@ class AtomxModel(object):
 
     @property
     def _dirty_json(self):
-        dirty = {}
-        for attr in self._dirty:
-            val = self._attributes[attr]
-            if isinstance(val, datetime) or isinstance(val, date):
-                dirty[attr] = val.isoformat()
-            elif isinstance(val, Decimal):
-                dirty[attr] = float(val)
-            elif isinstance(val, set):
-                dirty[attr] = list(val)
-            else:
-                dirty[attr] = val
-
-        return dirty
+        return dict((attr, _json_value(self._attributes[attr])) for attr in self._dirty)
+
+    @property
+    def _create_json(self):
+        return dict((k, _json_value(v)) for k, v in self.json.items())
 
     @property
     def json(self):
         """Returns the model attributes as :class:`dict`."""
-        return self._attributes
+        attributes = self._attributes
+        for k, v in attributes.items():
+            if isinstance(v, string_types) and (k.endswith('_at') or k == 'date'):
+                parsed = _parse_date(k, v)
+                if parsed is not None:
+                    attributes[k] = parsed
+        return attributes
 
     def create(self, session=None):
         """`POST` the model to the api and populates attributes with api response.
@@ -150,7 +244,7 @@ class AtomxModel(object):
         session = session or self.session
         if not session:
             raise NoSessionError
-        res = session.post(self._resource_name, json=self.json)
+        res = session.post(self._resource_name, json=self._create_json)
         self.__init__(session=session, **res)
         return self
 
@@ -239,10 +333,46 @@ class AtomxModel(object):
                           offset=offset, limit=limit, sort=sort)
         return res
 
+    def acreate(self, session=None):
+        """Coroutine version of :meth:`.AtomxModel.create`
+        for :class:`atomx.aio.AsyncAtomx` sessions. Use as ``await model.acreate()``.
+        """
+        from atomx.aio import _create
+        return _create(self, session)
+
+    def asave(self, session=None):
+        """Coroutine version of :meth:`.AtomxModel.save`
+        for :class:`atomx.aio.AsyncAtomx` sessions. Use as ``await model.asave()``.
+        """
+        from atomx.aio import _save
+        return _save(self, session)
+
+    def adelete(self, session=None):
+        """Coroutine version of :meth:`.AtomxModel.delete`
+        for :class:`atomx.aio.AsyncAtomx` sessions. Use as ``await model.adelete()``.
+        """
+        from atomx.aio import _delete
+        return _delete(self, session)
+
+    def areload(self, session=None, **kwargs):
+        """Coroutine version of :meth:`.AtomxModel.reload`
+        for :class:`atomx.aio.AsyncAtomx` sessions. Use as ``await model.areload()``.
+        """
+        from atomx.aio import _reload
+        return _reload(self, session, **kwargs)
+
+    def ahistory(self, session=None, offset=0, limit=100, sort='date.asc'):
+        """Coroutine version of :meth:`.AtomxModel.history`
+        for :class:`atomx.aio.AsyncAtomx` sessions. Use as ``await model.ahistory()``.
+        """
+        from atomx.aio import _history
+        return _history(self, session, offset=offset, limit=limit, sort=sort)
+
 
 for m in __all__:
     locals()[m] = type(m, (AtomxModel,),
-                       {'__doc__': ':class:`.AtomxModel` for {}'.format(m)})
+                       {'__doc__': ':class:`.AtomxModel` for {}'.format(m),
+                        '__slots__': ()})
 
 
 class Report(object):
@@ -265,6 +395,8 @@ class Report(object):
         self.columns = columns
         self.created_at = created_at
         self.is_scheduled_report = is_scheduled_report
+        #: `False` while the api is still creating the report
+        self.is_ready = kwargs.get('is_ready', data is not None or length is not None)
 
         if self.to:
             self.to = datetime.strptime(self.to, '%Y-%m-%d %H:00:00')
@@ -281,6 +413,42 @@ class Report(object):
     def _resource_name(cls):
         return 'report'
 
+    def _update(self, report):
+        """Update ``self`` with the attributes of the freshly loaded ``report``."""
+        session = self.session
+        self.__dict__.update(report.__dict__)
+        self.__dict__.pop('_pandas_df', None)
+        self.session = session or report.session
+
+    def wait(self, timeout=None, session=None):
+        """Wait until the report is ready.
+
+        The report status is polled with exponential backoff by the
+        :attr:`atomx.Atomx.report_poller` of the session, which polls all
+        pending reports of a session in one background thread.
+        The rows aren't loaded, get them with :meth:`iter_rows`, :meth:`iter_chunks`,
+        :meth:`download` or :attr:`pandas`.
+
+        :param float timeout: Maximum seconds to wait. (default: wait forever)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: ``self``
+        :raises: :class:`atomx.exceptions.ReportTimeoutError` if the report
+            isn't ready after ``timeout`` seconds.
+        """
+        session = session or self.session
+        if not session:
+            raise NoSessionError
+        return session.report_poller.wait(self, timeout)
+
+    def wait_async(self, timeout=None, session=None):
+        """Coroutine version of :meth:`wait`. Use as ``await report.wait_async()``.
+
+        Waiting doesn't block the event loop and doesn't need a thread per report.
+        """
+        from atomx.aio import _wait_report
+        return _wait_report(self, timeout, session)
+
     def save(self, session=None):
         """Update report `name` and `emails`"""
 
@@ -297,27 +465,229 @@ class Report(object):
             raise NoSessionError
         return session.delete('report', self.id)
 
+    def iter_chunks(self, chunk_size=10000, session=None):
+        """Iterate over the report rows in lists of up to ``chunk_size`` rows.
+
+        If the report `data` isn't loaded completely, the rows are requested
+        from the api with `limit`/`offset` chunk by chunk, so even reports with
+        millions of rows never have to be held in memory completely.
+
+        :param int chunk_size: Maximum number of rows per chunk. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: generator of lists of rows
+        """
+        if self.data is not None and (self.length is None or len(self.data) >= self.length):
+            for i in range(0, len(self.data), chunk_size):
+                yield self.data[i:i + chunk_size]
+            return
+
+        session = session or self.session
+        if not session:
+            raise NoSessionError
+        offset = 0
+        while self.length is None or offset < self.length:
+            chunk = session.get('report', self.id, limit=chunk_size, offset=offset)
+            rows = chunk.data or []
+            if self.columns is None:
+                self.columns = chunk.columns
+            if not rows:
+                return
+            yield rows
+            offset += len(rows)
+            if len(rows) < chunk_size:
+                return
+
+    def iter_rows(self, chunk_size=10000, session=None):
+        """Iterate over the report rows. See :meth:`iter_chunks`.
+
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: generator of rows
+        """
+        for chunk in self.iter_chunks(chunk_size, session):
+            for row in chunk:
+                yield row
+
+    def download(self, path, chunk_size=10000, session=None):
+        """Write the report as csv file to ``path`` chunk by chunk.
+        See :meth:`iter_chunks`.
+
+        :param str path: Path of the csv file.
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: Number of rows written
+        """
+        rows = 0
+        try:  # py3
+            f = open(path, 'w', newline='')
+        except TypeError:  # py2
+            f = open(path, 'wb')
+        with f:
+            writer = csv.writer(f)
+            header = False
+            for chunk in self.iter_chunks(chunk_size, session):
+                if not header:
+                    writer.writerow(self.columns)
+                    header = True
+                writer.writerows(chunk)
+                rows += len(chunk)
+        return rows
+
+    def iter_pandas(self, chunk_size=10000, session=None):
+        """Iterate over the report as pandas data frames of up to ``chunk_size`` rows.
+        See :meth:`iter_chunks` and :attr:`pandas`.
+
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: generator of :class:`pandas.DataFrame`
+        """
+        pd = _import_pandas()
+        for chunk in self.iter_chunks(chunk_size, session):
+            yield self._dataframe(pd, chunk)
+
+    def _dataframe(self, pd, rows):
+        res = pd.DataFrame(rows, columns=self.columns)
+        time_group = self._time_group
+        if time_group:
+            res.index = pd.to_datetime(res.pop(time_group))
+        return res
+
+    @property
+    def _time_group(self):
+        """The time column (`hour`, `day` or `month`) the report is grouped by or `None`."""
+        groups = (self.query or {}).get('groups', [])
+        for group in TIME_GROUPS:
+            if group in groups:
+                return group
+
+    def _column_dtype(self, column):
+        if column in TIME_GROUPS:
+            return 'datetime64[s]'
+        if column in (self.query or {}).get('metrics', []):
+            return 'float64'
+        if column == 'id' or column.endswith('_id'):
+            return 'int64'
+        return object
+
+    def to_numpy(self, chunk_size=10000, session=None):
+        """Returns the report as typed :mod:`numpy` array per column.
+
+        Rows are decoded chunk by chunk (see :meth:`iter_chunks`) directly into
+        columns: `int64` for ids, `float64` for metrics, `datetime64` for
+        the `hour`, `day` and `month` groups and `object` for everything else.
+        Id columns with missing values become `float64` with `NaN`.
+
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: :class:`collections.OrderedDict` of column name to :class:`numpy.ndarray`
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            raise NoNumpyInstalledError('To get the report as numpy arrays you '
+                                        'have to have numpy installed. '
+                                        'Do `pip install numpy` in your command line.')
+        parts = None
+        for chunk in self.iter_chunks(chunk_size, session):
+            if parts is None:
+                dtypes = [self._column_dtype(c) for c in self.columns]
+                parts = [[] for _ in self.columns]
+            for i, dtype in enumerate(dtypes):
+                parts[i].append(_typed_array(np, [row[i] for row in chunk], dtype))
+        if parts is None:
+            return OrderedDict((c, np.array([], dtype=self._column_dtype(c)))
+                               for c in self.columns or [])
+        return OrderedDict((c, p[0] if len(p) == 1 else np.concatenate(p))
+                           for c, p in zip(self.columns, parts))
+
+    def to_arrow(self, chunk_size=10000, session=None):
+        """Returns the report as :class:`pyarrow.Table` with the typed columns
+        of :meth:`to_numpy`.
+
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: :class:`pyarrow.Table`
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise NoPyArrowInstalledError('To get the report as arrow table you '
+                                          'have to have pyarrow installed. '
+                                          'Do `pip install pyarrow` in your command line.')
+        columns = self.to_numpy(chunk_size, session)
+        return pa.table([pa.array(a) for a in columns.values()], names=list(columns))
+
+    def to_pandas(self, chunk_size=10000, session=None):
+        """Returns the report as pandas data frame built from the typed columns
+        of :meth:`to_numpy` without copying them.
+
+        Like :attr:`pandas` a datetime index is set when grouped by a hour/day/month,
+        but ids are always `int64` and metrics `float64`. Faster and with less
+        memory than :attr:`pandas` for large reports.
+
+        :param int chunk_size: Number of rows to request per api call. (default: 10000)
+        :param session: The :class:`atomx.Atomx` session to use for the api calls.
+            (Optional if you specified a `session` at initialization)
+        :return: :class:`pandas.DataFrame`
+        """
+        pd = _import_pandas()
+        columns = self.to_numpy(chunk_size, session)
+        time_group = self._time_group
+        index = None
+        if time_group in columns:
+            index = pd.DatetimeIndex(columns.pop(time_group), name=time_group)
+        return pd.DataFrame(columns, index=index, copy=False)
+
     @property
     def pandas(self):
-        """Returns the content of the `report` as a pandas data frame."""
+        """Returns the content of the `report` as a pandas data frame.
+
+        Rows that aren't loaded yet are requested chunk by chunk with :meth:`iter_pandas`.
+        """
         if hasattr(self, '_pandas_df'):
             return self._pandas_df
 
-        try:
-            import pandas as pd
-        except ImportError:
-            raise NoPandasInstalledError('To get the report as a pandas dataframe you '
-                                         'have to have pandas installed. '
-                                         'Do `pip install pandas` in your command line.')
-
-        res = pd.DataFrame(self.data, columns=self.columns)
-        groups = self.query.get('groups', [])
-        if 'hour' in groups:
-            res.index = pd.to_datetime(res.pop('hour'))
-        elif 'day' in groups:
-            res.index = pd.to_datetime(res.pop('day'))
-        elif 'month' in groups:
-            res.index = pd.to_datetime(res.pop('month'))
+        pd = _import_pandas()
+        if self.data is not None and (self.length is None or len(self.data) >= self.length):
+            res = self._dataframe(pd, self.data)
+        else:
+            frames = list(self.iter_pandas())
+            res = pd.concat(frames) if frames else self._dataframe(pd, [])
 
         self._pandas_df = res
         return res
+
+
+#: Report groups that are converted to dates
+TIME_GROUPS = ('hour', 'day', 'month')
+
+
+def _typed_array(np, values, dtype):
+    """Convert ``values`` to a :mod:`numpy` array of ``dtype``, falling back
+    to `float64` (for missing ids) and `object`.
+    """
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        if dtype == 'int64':
+            try:
+                return np.array(values, dtype='float64')
+            except (TypeError, ValueError):
+                pass
+        return np.array(values, dtype=object)
+
+
+def _import_pandas():
+    try:
+        import pandas as pd
+    except ImportError:
+        raise NoPandasInstalledError('To get the report as a pandas dataframe you '
+                                     'have to have pandas installed. '
+                                     'Do `pip install pandas` in your command line.')
+    return pd
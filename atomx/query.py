@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+
+class _PartialGroup(object):
+    """Models of one projected :class:`Query` result that only have ``fields`` loaded.
+
+    The first access to another attribute of any of the models loads the
+    complete models of the whole group with as few `id` filtered requests as possible.
+    """
+    def __init__(self, session, resource, fields, chunk_size=100):
+        self.session = session
+        self.resource = resource
+        self.fields = frozenset(fields)
+        self.chunk_size = chunk_size
+        self.models = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load the missing attributes of all models of the group."""
+        with self._lock:
+            models, self.models = self.models, []
+            if not models:
+                return
+            by_id = dict((m._attributes.get('id'), m) for m in models)
+            ids = sorted(i for i in by_id if i is not None)
+            for i in range(0, len(ids), self.chunk_size):
+                chunk = ids[i:i + self.chunk_size]
+                res = self.session.get(self.resource, id=','.join(str(c) for c in chunk),
+                                       limit=len(chunk))
+                for loaded in res if isinstance(res, list) else [res]:
+                    model = by_id.get(loaded._attributes.get('id'))
+                    if model is None:
+                        continue
+                    for key, value in loaded._attributes.items():
+                        if key not in model._dirty:  # keep local changes
+                            model._attributes[key] = value
+            for model in models:
+                model._set_partial(None)
+
+
+class Query(object):
+    """Query builder for a list resource that requests only the selected fields.
+
+    Queries are immutable, every method returns a new :class:`Query`.
+    Create them with :meth:`atomx.Atomx.query`::
+
+        >>> query = atomx.query(models.Campaign).only('budget', 'state').filter(
+        ...     state='ACTIVE').order_by('budget.desc')
+        >>> for campaign in query:
+        ...     print(campaign.id, campaign.budget)  # only `id, budget, state` requested
+        >>> campaign.name  # loads the complete models of all campaigns with one request
+
+    Models of a query with :meth:`only` fields are partial
+    (:attr:`atomx.models.AtomxModel.is_partial`). Accessing an attribute that wasn't
+    requested loads the remaining attributes of all models of the same result at
+    once, instead of lazy loading it model by model.
+
+    :param session: :class:`atomx.Atomx` session.
+    :param model: :class:`atomx.models.AtomxModel` class or resource name to query.
+    """
+    def __init__(self, session, model):
+        self.session = session
+        self.model = model
+        self._fields = None
+        self._params = {}
+
+    def _clone(self, fields=None, **params):
+        query = Query(self.session, self.model)
+        query._fields = self._fields if fields is None else fields
+        query._params = dict(self._params, **params)
+        return query
+
+    def __repr__(self):
+        return 'Query({}, fields={}, params={})'.format(
+            getattr(self.model, '__name__', self.model), self._fields, self._params)
+
+    @property
+    def resource(self):
+        """The api resource name of the queried model."""
+        return getattr(self.model, '_resource_name', self.model)
+
+    def only(self, *fields):
+        """Only request ``fields`` (and `id`) of the models."""
+        fields = ['id'] + [f for f in fields if f != 'id']
+        return self._clone(fields=tuple(fields))
+
+    def filter(self, **filters):
+        """Only return models matching ``filters``, e.g. ``filter(state='ACTIVE')``.
+        List values are sent comma separated (e.g. ``filter(id=[1, 2, 3])``).
+        """
+        return self._clone(**dict(
+            (k, ','.join(str(i) for i in v) if isinstance(v, (list, tuple, set)) else v)
+            for k, v in filters.items()))
+
+    def order_by(self, *columns):
+        """Sort the models by ``columns``, e.g. ``order_by('budget.desc')``."""
+        return self._clone(sort=','.join(columns))
+
+    def limit(self, limit):
+        """Return at most ``limit`` models."""
+        return self._clone(limit=limit)
+
+    def params(self):
+        """Returns the URL parameters of the query."""
+        params = dict(self._params)
+        if self._fields is not None:
+            params['attributes'] = ','.join(self._fields)
+        return params
+
+    def __iter__(self):
+        """Iterate over the models page by page. See :meth:`atomx.Atomx.iter`."""
+        group = None
+        for model in self.session.iter(self.resource, **self.params()):
+            if self._fields is not None:
+                if group is None or len(group.models) >= 1000:
+                    group = _PartialGroup(self.session, self.resource, self._fields)
+                group.models.append(model)
+                model._set_partial(group)
+            yield model
+
+    def all(self):
+        """Returns a list of all models."""
+        return list(self)
+
+    def first(self):
+        """Returns the first model or `None`."""
+        for model in self.limit(1):
+            return model
+
+    def get(self, id):
+        """Returns the model with ``id``."""
+        for model in self.filter(id=id).limit(1):
+            return model
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import random
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from numbers import Number
+try:  # py3
+    from time import monotonic as _now
+except ImportError:  # py2
+    from time import time as _now
+
+from atomx.exceptions import ReportTimeoutError
+from atomx.utils import current_hour
+
+_HOUR_FORMAT = '%Y-%m-%d %H:00:00'
+
+#: Possible values for the ``split`` parameter of :meth:`atomx.Atomx.report`
+SPLITS = ('hour', 'day', 'week')
+
+
+class _PendingReport(object):
+    __slots__ = ('report', 'callbacks', 'delay', 'next_poll')
+
+    def __init__(self, report, delay):
+        self.report = report
+        self.callbacks = []
+        self.delay = delay
+        self.next_poll = _now() + delay
+
+
+class ReportPoller(object):
+    """Waits for pending :class:`atomx.models.Report` of a session to be ready.
+
+    All pending reports share one background thread that polls the status of
+    each report with exponential backoff and jitter. Once a report is ready
+    its status is updated and the callbacks waiting for it are called.
+    The rows aren't loaded, so large reports can be read in chunks with
+    :meth:`atomx.models.Report.iter_chunks` or :meth:`atomx.models.Report.download`.
+
+    Use it through :meth:`atomx.models.Report.wait` or
+    :meth:`atomx.models.Report.wait_async`, which use the
+    :attr:`atomx.Atomx.report_poller` of the report session.
+
+    :param session: :class:`atomx.Atomx` or :class:`atomx.aio.AsyncAtomx` session
+        to poll with.
+    :param float initial_delay: Seconds until the first status poll. (default: 0.5)
+    :param float max_delay: Maximum seconds between two status polls of a report.
+        (default: 30)
+    :param float factor: Multiplier for the delay after each poll. (default: 2)
+    :param float jitter: Random relative deviation of the delays, so reports
+        created at the same time don't get polled at the same time. (default: 0.1)
+    """
+    def __init__(self, session, initial_delay=0.5, max_delay=30, factor=2, jitter=0.1):
+        self.session = session
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, report, callback):
+        """Call ``callback(report, error)`` once ``report`` is ready or polling it failed.
+
+        ``error`` is `None` or the exception raised while polling.
+        The callback is called from the poller thread.
+        """
+        if report.is_ready:
+            callback(report, None)
+            return
+        with self._condition:
+            pending = self._pending.get(report.id)
+            if pending is None:
+                pending = self._pending[report.id] = _PendingReport(report, self.initial_delay)
+            pending.callbacks.append(callback)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='atomx-report-poller')
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def discard(self, report, callback):
+        """Stop waiting with ``callback`` for ``report``."""
+        with self._condition:
+            pending = self._pending.get(report.id)
+            if pending is not None and callback in pending.callbacks:
+                pending.callbacks.remove(callback)
+                if not pending.callbacks:
+                    del self._pending[report.id]
+
+    def wait(self, report, timeout=None):
+        """Block until ``report`` is ready.
+
+        :param report: :class:`atomx.models.Report` to wait for.
+        :param float timeout: Maximum seconds to wait. (default: wait forever)
+        :return: ``report``
+        :raises: :class:`atomx.exceptions.ReportTimeoutError` if the report
+            isn't ready after ``timeout`` seconds.
+        """
+        done = threading.Event()
+        errors = []
+
+        def callback(report, error):
+            if error is not None:
+                errors.append(error)
+            done.set()
+
+        self.add(report, callback)
+        if not done.wait(timeout):
+            self.discard(report, callback)
+            raise ReportTimeoutError('Report {} not ready after {} seconds.'.format(
+                report.id, timeout))
+        if errors:
+            raise errors[0]
+        return report
+
+    def _delay(self, delay):
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._thread = None
+                    return
+                now = _now()
+                due = [p for p in self._pending.values() if p.next_poll <= now]
+                if not due:
+                    self._condition.wait(min(p.next_poll for p in self._pending.values()) - now)
+                    continue
+            for pending in due:
+                self._poll(pending)
+
+    def _poll(self, pending):
+        report = pending.report
+        error = None
+        try:
+            # only request the status (and at most 1 row) until the report is ready
+            status = self.session._blocking_get('report/{}'.format(report.id), {'limit': 1})
+            if status.is_ready:
+                if status.data is not None and len(status.data) < (status.length or 0):
+                    status.data = None  # only the first row, the rows get loaded on demand
+                report._update(status)
+        except Exception as e:
+            error = e
+        with self._condition:
+            if error is None and not report.is_ready:
+                pending.delay = min(pending.delay * self.factor, self.max_delay)
+                pending.next_poll = _now() + self._delay(pending.delay)
+                return
+            self._pending.pop(report.id, None)
+            callbacks = list(pending.callbacks)
+        for callback in callbacks:
+            callback(report, error)
+
+
+class ReportSeries(object):
+    """Hourly report that is updated incrementally.
+
+    The rows of the report are stored per `hour`. :meth:`update` only requests
+    the hours that weren't fetched yet and the hours that weren't complete
+    yet when they were fetched (i.e. the current hour), and merges them into
+    the stored rows. So a job that needs the last 7 days every hour only
+    requests the newest hours instead of the whole week.
+
+    Example::
+
+        >>> series = ReportSeries(atomx, groups=['site_id'], metrics=['impressions'],
+        ...                       path='/var/cache/site-impressions.json.gz')
+        >>> report = series.report(from_=datetime.now() - timedelta(days=7))
+        >>> df = report.pandas
+
+    :param session: :class:`atomx.Atomx` session to create the reports with.
+    :param list groups: columns to group by. `hour` is added as first group if missing.
+    :param list metrics: columns to sum on.
+    :param str scope: Report scope. See :meth:`atomx.Atomx.report`.
+    :param list where: Report filter. See :meth:`atomx.Atomx.report`.
+    :param str timezone: Timezone used for all times. (default: `UTC`)
+    :param str path: File to persist the fetched hours in, so they survive restarts.
+        (default: `None`)
+    """
+    def __init__(self, session, groups=None, metrics=None, scope=None, where=None,
+                 timezone='UTC', path=None):
+        groups = list(groups or [])
+        if 'hour' not in groups:
+            groups.insert(0, 'hour')
+        self.session = session
+        self.groups = groups
+        self.metrics = list(metrics or [])
+        self.scope = scope
+        self.where = where
+        self.timezone = timezone
+        self.path = path
+        self.columns = None
+        self._hours = {}
+        # hours before this one were complete when they were fetched
+        self._complete_before = None
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    @property
+    def hours(self):
+        """Sorted list of the stored hours as :class:`datetime.datetime`."""
+        return [datetime.strptime(h, _HOUR_FORMAT) for h in sorted(self._hours)]
+
+    def missing(self, from_, to):
+        """Returns the ``(from_, to)`` range that has to be requested to have all
+        rows from ``from_`` until ``to``, or `None` if all hours are stored.
+        """
+        hour = from_.replace(minute=0, second=0, microsecond=0)
+        while hour < to:
+            key = hour.strftime(_HOUR_FORMAT)
+            if key not in self._hours or key >= self._complete_before:
+                return hour, to
+            hour += timedelta(hours=1)
+        return None
+
+    def update(self, from_=None, to=None):
+        """Request the missing hours between ``from_`` and ``to`` and store them.
+
+        :param datetime.datetime from_: Start of the range. (Defaults to last week)
+        :param datetime.datetime to: End of the range (exclusive).
+            (Defaults to `datetime.now()`)
+        :return: Number of requested hours.
+        """
+        from_, to = self._range(from_, to)
+        missing = self.missing(from_, to)
+        if missing is None:
+            return 0
+        start, end = missing
+        complete_before = current_hour(self.timezone).strftime(_HOUR_FORMAT)
+        report = self.session.report(scope=self.scope, groups=self.groups,
+                                     metrics=self.metrics, where=self.where, from_=start,
+                                     to=end, timezone=self.timezone, save=False)
+        if not report.is_ready:
+            report.wait()
+
+        hour_index = report.columns.index('hour')
+        fetched = {}
+        for row in report.iter_rows():
+            fetched.setdefault(str(row[hour_index]), []).append(row)
+        self.columns = report.columns
+        hours = 0
+        while start < end:
+            key = start.strftime(_HOUR_FORMAT)
+            self._hours[key] = fetched.get(key, [])
+            start += timedelta(hours=1)
+            hours += 1
+        self._complete_before = complete_before
+        if self.path is not None:
+            self._save()
+        return hours
+
+    def report(self, from_=None, to=None):
+        """Update the series and return the rows between ``from_`` and ``to`` as
+        :class:`atomx.models.Report`.
+
+        :param datetime.datetime from_: Start of the report. (Defaults to last week)
+        :param datetime.datetime to: End of the report (exclusive).
+            (Defaults to `datetime.now()`)
+        :return: :class:`atomx.models.Report` without `id` and `totals`.
+        """
+        from atomx.models import Report
+        from_, to = self._range(from_, to)
+        self.update(from_, to)
+        start, end = from_.strftime(_HOUR_FORMAT), to.strftime(_HOUR_FORMAT)
+        data = [row for hour in sorted(self._hours) if start <= hour < end
+                for row in self._hours[hour]]
+        query = {'groups': self.groups, 'metrics': self.metrics, 'where': self.where,
+                 'scope': self.scope, 'timezone': self.timezone}
+        return Report(id=None, session=self.session, query=query, columns=self.columns,
+                      data=data, length=len(data), from_=start, to=end)
+
+    def prune(self, before):
+        """Remove all stored hours before ``before``."""
+        before = before.strftime(_HOUR_FORMAT)
+        for hour in [h for h in self._hours if h < before]:
+            del self._hours[hour]
+        if self.path is not None:
+            self._save()
+
+    @staticmethod
+    def _range(from_, to):
+        if to is None:
+            to = datetime.now()
+        if from_ is None:
+            from_ = to - timedelta(days=7)
+        return (from_.replace(minute=0, second=0, microsecond=0),
+                to.replace(minute=0, second=0, microsecond=0))
+
+    def _state(self):
+        return {'groups': self.groups, 'metrics': self.metrics, 'where': self.where,
+                'scope': self.scope, 'timezone': self.timezone}
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            stored = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        if stored['query'] != json.loads(json.dumps(self._state())):
+            return  # stored rows of a different report
+        self.columns = stored['columns']
+        self._hours = stored['hours']
+        self._complete_before = stored['complete_before']
+
+    def _save(self):
+        content = {'query': self._state(), 'columns': self.columns, 'hours': self._hours,
+                   'complete_before': self._complete_before}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(json.dumps(content).encode('utf-8')))
+        try:
+            os.replace(tmp, self.path)
+        except AttributeError:  # py2
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp, self.path)
+
+
+def _next_boundary(time, split):
+    """Returns the start of the `hour`, `day` or `week` after ``time``."""
+    time = time.replace(minute=0, second=0, microsecond=0)
+    if split == 'hour':
+        return time + timedelta(hours=1)
+    time = time.replace(hour=0)
+    if split == 'day':
+        return time + timedelta(days=1)
+    return time + timedelta(days=7 - time.weekday())
+
+
+def split_range(from_, to, split):
+    """Split the time range ``from_`` - ``to`` at every full `hour`, `day` or `week`.
+
+    E.g.::
+
+        >>> split_range(datetime(2016, 1, 1, 12), datetime(2016, 1, 3), 'day')
+        [(datetime(2016, 1, 1, 12), datetime(2016, 1, 2)),
+         (datetime(2016, 1, 2), datetime(2016, 1, 3))]
+
+    :param datetime.datetime from_: Start of the range.
+    :param datetime.datetime to: End of the range (exclusive).
+    :param str split: One of :data:`SPLITS`.
+    :return: :class:`list` of ``(from_, to)`` tuples.
+    """
+    if split not in SPLITS:
+        raise ValueError('`split` has to be one of {}.'.format(', '.join(SPLITS)))
+    ranges = []
+    while from_ < to:
+        end = min(_next_boundary(from_, split), to)
+        ranges.append((from_, end))
+        from_ = end
+    return ranges
+
+
+def _add(a, b):
+    if isinstance(a, Number) and isinstance(b, Number):
+        return a + b
+    return a if b is None else b
+
+
+def combine_reports(reports, groups, metrics):
+    """Combine the rows of ``reports`` for consecutive time ranges into one list of rows.
+
+    Rows with the same ``groups`` values (e.g. the same `site_id` in reports
+    without a time group) are merged by adding up their ``metrics``, so this
+    is only correct for additive metrics like impressions, clicks or costs.
+
+    :param list reports: :class:`atomx.models.Report` with the same columns.
+    :param list groups: Group columns of the reports.
+    :param list metrics: Metric columns of the reports.
+    :return: ``(columns, rows, totals)``
+    """
+    columns = reports[0].columns
+    group_indexes = [columns.index(g) for g in groups if g in columns]
+    metric_indexes = [columns.index(m) for m in metrics if m in columns]
+    rows = OrderedDict()
+    for report in reports:
+        for row in report.iter_rows():
+            key = tuple(row[i] for i in group_indexes)
+            combined = rows.get(key)
+            if combined is None:
+                rows[key] = list(row)
+            else:
+                for i in metric_indexes:
+                    combined[i] = _add(combined[i], row[i])
+
+    totals = None
+    for report in reports:
+        if isinstance(report.totals, dict):
+            if totals is None:
+                totals = dict(report.totals)
+            else:
+                for key, value in report.totals.items():
+                    totals[key] = _add(totals.get(key), value)
+    return columns, list(rows.values()), totals
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+import re
+import threading
+from bisect import bisect_left
+
+#: Default upper bounds in seconds of the :class:`Histogram` buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_ID_RE = re.compile(r'(?<=/)\d+(?=/|$)|^\d+(?=/|$)')
+
+
+def endpoint_name(resource):
+    """Returns the ``resource`` path with ids replaced by ``:id``, so requests for
+    different models of a resource are counted together.
+
+    E.g.::
+
+        >>> endpoint_name('campaign/42/profiles')
+        'campaign/:id/profiles'
+    """
+    return _ID_RE.sub(':id', resource.split('?')[0].strip('/'))
+
+
+class Histogram(object):
+    """Histogram of observed values (e.g. seconds) with cumulative ``buckets``
+    like prometheus histograms.
+    """
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """Returns a list of ``(upper_bound, count)`` including the `+Inf` bucket."""
+        total, result = 0, []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float('inf'), self.count))
+        return result
+
+    def as_dict(self):
+        return {'count': self.count, 'sum': self.sum,
+                'buckets': dict((str(bound), count) for bound, count in self.cumulative())}
+
+
+class Stats(object):
+    """Counters and timings of the api requests of a session.
+
+    Pass ``stats=True`` (or a :class:`Stats` instance to share it between
+    sessions) to :class:`atomx.Atomx` to enable it. Records per endpoint
+    (e.g. ``campaign/:id``):
+
+    - the request latency histogram, number of responses per status,
+    - bytes sent and received,
+    - number of retries,
+    - number of conditional requests (see :class:`atomx.cache.ResponseCache`) and
+      how many of them were `304 Not Modified` (`revalidation_hit_rate`),
+
+    and for the whole session:
+
+    - the time to decode the json responses,
+    - the time to build the :mod:`atomx.models` and the number of models built,
+    - the number of attributes that were lazy loaded per model and attribute.
+
+    Example::
+
+        >>> atomx = Atomx('apiuser@example.com', 'password', stats=True)
+        >>> atomx.get('campaigns')
+        >>> atomx.stats.as_dict()['requests']['GET campaigns']['latency']['count']
+        1
+        >>> print(atomx.stats.prometheus())  # e.g. to serve on `/metrics`
+
+    :param buckets: Upper bounds in seconds of the histogram buckets.
+        (default: :data:`DEFAULT_BUCKETS`)
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all counters."""
+        with self._lock:
+            self._endpoints = {}
+            self.decode = Histogram(self.buckets)
+            self.model_build = Histogram(self.buckets)
+            self.models = 0
+            self.lazy_loads = {}
+
+    def _endpoint(self, method, resource):
+        key = (method, endpoint_name(resource))
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            endpoint = self._endpoints[key] = {
+                'latency': Histogram(self.buckets), 'statuses': {},
+                'bytes_out': 0, 'bytes_in': 0, 'retries': 0,
+                'revalidations': 0, 'not_modified': 0}
+        return endpoint
+
+    def record_request(self, method, resource, seconds, status, bytes_out=0, bytes_in=0):
+        """Record a request to ``resource`` that took ``seconds``.
+        ``status`` is the HTTP status code or `None` if the request failed.
+        """
+        with self._lock:
+            endpoint = self._endpoint(method, resource)
+            endpoint['latency'].observe(seconds)
+            endpoint['statuses'][status] = endpoint['statuses'].get(status, 0) + 1
+            endpoint['bytes_out'] += bytes_out
+            endpoint['bytes_in'] += bytes_in
+
+    def record_retry(self, method, resource):
+        """Record that a request to ``resource`` is retried."""
+        with self._lock:
+            self._endpoint(method, resource)['retries'] += 1
+
+    def record_revalidation(self, method, resource, not_modified):
+        """Record a conditional request to ``resource`` and if it was ``not_modified``."""
+        with self._lock:
+            endpoint = self._endpoint(method, resource)
+            endpoint['revalidations'] += 1
+            if not_modified:
+                endpoint['not_modified'] += 1
+
+    def record_decode(self, seconds):
+        """Record the ``seconds`` it took to decode a json response."""
+        with self._lock:
+            self.decode.observe(seconds)
+
+    def record_models(self, seconds, count):
+        """Record the ``seconds`` it took to build ``count`` models."""
+        with self._lock:
+            self.model_build.observe(seconds)
+            self.models += count
+
+    def record_lazy_load(self, model, attribute):
+        """Record that ``attribute`` of a ``model`` (class name) was lazy loaded."""
+        key = (model, attribute)
+        with self._lock:
+            self.lazy_loads[key] = self.lazy_loads.get(key, 0) + 1
+
+    def as_dict(self):
+        """Returns all counters as :class:`dict`."""
+        with self._lock:
+            requests = {}
+            for (method, endpoint), values in self._endpoints.items():
+                requests['{} {}'.format(method, endpoint)] = dict(
+                    values, latency=values['latency'].as_dict(),
+                    statuses=dict(values['statuses']),
+                    revalidation_hit_rate=float(values['not_modified']) / values['revalidations']
+                    if values['revalidations'] else None)
+            return {
+                'requests': requests,
+                'decode': self.decode.as_dict(),
+                'model_build': self.model_build.as_dict(),
+                'models': self.models,
+                'lazy_loads': dict(('{}.{}'.format(*key), count)
+                                   for key, count in self.lazy_loads.items()),
+            }
+
+    def prometheus(self, prefix='atomx'):
+        """Returns all counters in the prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help):
+            lines.append('# HELP {}_{} {}'.format(prefix, name, help))
+            lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+        def sample(name, labels, value):
+            labels = ','.join('{}="{}"'.format(k, str(v).replace('"', '\\"'))
+                              for k, v in labels)
+            lines.append('{}_{}{} {}'.format(prefix, name, '{' + labels + '}' if labels else '',
+                                             repr(float(value)) if isinstance(value, float)
+                                             else value))
+
+        def histogram(name, labels, h):
+            for bound, count in h.cumulative():
+                sample(name + '_bucket', labels + [('le', '+Inf' if bound == float('inf')
+                                                   else repr(float(bound)))], count)
+            sample(name + '_sum', labels, h.sum)
+            sample(name + '_count', labels, h.count)
+
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            metric('request_duration_seconds', 'histogram', 'Latency of api requests.')
+            for (method, endpoint), values in endpoints:
+                histogram('request_duration_seconds',
+                          [('method', method), ('endpoint', endpoint)], values['latency'])
+            metric('responses_total', 'counter', 'Api responses by status code.')
+            for (method, endpoint), values in endpoints:
+                for status, count in sorted(values['statuses'].items(), key=str):
+                    sample('responses_total', [('method', method), ('endpoint', endpoint),
+                                               ('status', status or 'error')], count)
+            for name, key, help in [('request_bytes_total', 'bytes_out', 'Bytes sent.'),
+                                    ('response_bytes_total', 'bytes_in', 'Bytes received.'),
+                                    ('retries_total', 'retries', 'Retried requests.'),
+                                    ('revalidations_total', 'revalidations',
+                                     'Conditional requests.'),
+                                    ('not_modified_total', 'not_modified',
+                                     'Conditional requests answered with 304 Not Modified.')]:
+                metric(name, 'counter', help)
+                for (method, endpoint), values in endpoints:
+                    sample(name, [('method', method), ('endpoint', endpoint)], values[key])
+            metric('decode_seconds', 'histogram', 'Time to decode json responses.')
+            histogram('decode_seconds', [], self.decode)
+            metric('model_build_seconds', 'histogram', 'Time to build models of a response.')
+            histogram('model_build_seconds', [], self.model_build)
+            metric('models_total', 'counter', 'Number of models built.')
+            sample('models_total', [], self.models)
+            metric('lazy_loads_total', 'counter', 'Lazy loaded model attributes.')
+            for (model, attribute), count in sorted(self.lazy_loads.items()):
+                sample('lazy_loads_total', [('model', model), ('attribute', attribute)], count)
+        return '\n'.join(lines) + '\n'
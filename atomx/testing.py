@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the atomx api to test code that uses :mod:`atomx` without network.
+
+Example::
+
+    >>> with serve() as server:
+    ...     server.routes[('GET', '/v3/campaign/1')] = lambda params, body, headers: (
+    ...         200, resource_response('campaign', {'id': 1, 'name': 'test'}))
+    ...     atomx = Atomx('user@example.com', 'password', api_endpoint=server.endpoint)
+    ...     assert atomx.get('campaign', 1).name == 'test'
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+try:  # py3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:  # py2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+
+class MockAPIServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server that answers api requests with the functions in ``routes``.
+
+    ``routes`` maps ``(method, path)`` to a function ``f(params, body, headers)``
+    that returns ``(status_code, json_body)`` or ``(status_code, json_body, headers)``.
+    ``patterns`` is a list of ``(method, regex, f)`` for paths that aren't in
+    ``routes``, the regex groups are passed to ``f`` as additional arguments.
+
+    :param float latency: Seconds to wait before answering each request.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), MockAPIHandler)
+        self.latency = latency
+        self.routes = {
+            ('POST', '/v3/login'): lambda params, body, headers: (200, {
+                'auth_token': 'token', 'user': {'id': 1, 'networks': [], 'publishers': [],
+                                                'advertisers': [1]}}),
+        }
+        self.patterns = []
+        self.connections = 0
+        self.requests = []
+
+    @property
+    def endpoint(self):
+        return 'http://127.0.0.1:{}/v3/'.format(self.server_address[1])
+
+    def route(self, method, path):
+        """Returns the function that answers ``method`` requests for ``path`` or `None`."""
+        route = self.routes.get((method, path))
+        if route is not None:
+            return route
+        for pattern_method, regex, f in self.patterns:
+            match = regex.match(path) if pattern_method == method else None
+            if match:
+                return lambda params, body, headers: f(params, body, headers, *match.groups())
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        url = urlparse(self.path)
+        params = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length).decode('utf-8')) if length else None
+        self.server.requests.append((self.command, url.path, params))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        route = self.server.route(self.command, url.path)
+        if route is None:
+            res = (404, {'success': False, 'error': 'Not found'})
+        else:
+            res = route(params, body, self.headers)
+        status, content = res[0], res[1]
+        headers = res[2] if len(res) > 2 else {}
+        payload = json.dumps(content).encode('utf-8') if content is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+
+def resource_response(resource, payload, **meta):
+    """Returns the json body of a successful api response with ``payload`` as ``resource``
+    and the additional ``meta`` info (e.g. ``count=100``).
+    """
+    res = {'success': True, 'resource': resource, resource: payload}
+    res.update(meta)
+    return res
+
+
+@contextmanager
+def serve(latency=0):
+    """Context manager that runs a :class:`MockAPIServer` in a background thread.
+
+    :param float latency: Seconds to wait before answering each request.
+    :return: the running :class:`MockAPIServer`
+    """
+    server = MockAPIServer(latency=latency)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
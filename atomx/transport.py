@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+import random
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+try:  # py3
+    from time import monotonic as _now
+except ImportError:  # py2
+    from time import time as _now
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from atomx.exceptions import CircuitOpenError
+
+
+class RequestsTransport(object):
+    """Default HTTP transport of :class:`atomx.Atomx`.
+
+    All api calls of a session go through one pooled :class:`requests.Session`
+    so connections to the api are kept alive and reused instead of doing a
+    new TCP and TLS handshake for every request.
+
+    You can pass any object with a ``request(method, url, **kwargs)`` method
+    that returns a :class:`requests.Response` (and optionally a ``close()`` method)
+    as ``transport`` to :class:`atomx.Atomx`.
+
+    :param int pool_connections: Number of connection pools (one per host) to cache.
+        (default: 10)
+    :param int pool_maxsize: Maximum number of connections that are kept
+        open per host. (default: 10)
+    :param bool pool_block: If ``True`` wait for a free connection once ``pool_maxsize``
+        connections to a host are in use, instead of opening an additional
+        connection that gets discarded afterwards. (default: `False`)
+    """
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a HTTP request.
+
+        :param str method: HTTP method. E.g. `GET`, `POST`, `PUT`, `DELETE`.
+        :param str url: Full url of the request.
+        :param kwargs: Passed on to :meth:`requests.Session.request`.
+        :return: :class:`requests.Response`
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+class RetryPolicy(object):
+    """When and how long to wait before a failed api request is sent again.
+
+    Requests are retried if the api answers with one of the ``statuses`` or the
+    transport raises one of the ``exceptions`` (e.g. connection errors).
+    Only idempotent ``methods`` are retried, since a `POST` that failed with
+    a server error might have created the model anyway.
+    `429 Too Many Requests` responses are always retried because the api
+    rejected the request without processing it.
+
+    The delay before the n-th retry is ``backoff * 2 ** n`` seconds
+    (up to ``max_backoff``) with random ``jitter``, or the seconds of the
+    `Retry-After` header of the response.
+
+    :param int retries: Maximum number of retries per request. (default: 3)
+    :param float backoff: Seconds to wait before the first retry. (default: 0.5)
+    :param float max_backoff: Maximum seconds to wait between retries. (default: 30)
+    :param float jitter: Random relative deviation of the delays. (default: 0.1)
+    :param statuses: HTTP status codes to retry. (default: 429, 502, 503, 504)
+    :param methods: HTTP methods to retry. (default: `GET`, `PUT`, `DELETE`)
+    :param bool retry_post: Also retry `POST` requests. (default: `False`)
+    :param exceptions: Transport exceptions to retry.
+        (default: :class:`requests.ConnectionError` and :class:`requests.Timeout`)
+    :param float max_retry_after: Maximum seconds to wait for a `Retry-After`. (default: 120)
+    """
+    def __init__(self, retries=3, backoff=0.5, max_backoff=30, jitter=0.1,
+                 statuses=(429, 502, 503, 504), methods=('GET', 'PUT', 'DELETE'),
+                 retry_post=False, exceptions=(requests.ConnectionError, requests.Timeout),
+                 max_retry_after=120):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods) | (frozenset(['POST']) if retry_post else frozenset())
+        self.exceptions = tuple(exceptions)
+        self.max_retry_after = max_retry_after
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        """Returns `True` if the ``attempt`` th retry of a request should be sent.
+
+        :param str method: HTTP method of the request.
+        :param int attempt: Number of retries so far.
+        :param response: The response of the last try or `None`.
+        :param error: The exception of the last try or `None`.
+        """
+        if attempt >= self.retries:
+            return False
+        if error is not None:
+            return isinstance(error, self.exceptions) and method in self.methods
+        if response.status_code == 429:
+            return True
+        return response.status_code in self.statuses and method in self.methods
+
+    def delay(self, attempt, response=None):
+        """Returns the seconds to wait before the ``attempt`` th retry."""
+        retry_after = self.retry_after(response)
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+        return max(0, delay * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def retry_after(self, response):
+        """Returns the seconds of the `Retry-After` header of ``response`` or `None`."""
+        value = response.headers.get('Retry-After') if response is not None else None
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            date = parsedate_tz(value)
+            if date is None:
+                return None
+            seconds = mktime_tz(date) - time.time()
+        return min(max(0, seconds), self.max_retry_after)
+
+
+class RateLimiter(object):
+    """Token bucket that limits the request rate of all threads (and sessions)
+    that share it.
+
+    :param float rate: Requests per second.
+    :param int burst: Number of requests that can be sent at once after an idle
+        period. (default: ``rate``, at least 1)
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = _now()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent.
+
+        :return: Seconds waited.
+        """
+        with self._lock:
+            now = _now()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1  # reserve a token, a negative balance is the queue
+            wait = max(-self._tokens / self.rate, self._paused_until - now, 0)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Don't let any request through for ``seconds``,
+        e.g. after the api answered with `429 Too Many Requests`.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, _now() + seconds)
+
+
+class CircuitBreaker(object):
+    """Stops sending requests to an api that keeps failing.
+
+    After ``failure_threshold`` consecutive failures (connection errors or
+    server errors) the circuit opens and all requests fail immediately with
+    :class:`atomx.exceptions.CircuitOpenError` for ``reset_timeout`` seconds.
+    Then a single trial request is let through, if it succeeds the circuit closes again.
+
+    :param int failure_threshold: Consecutive failures that open the circuit. (default: 5)
+    :param float reset_timeout: Seconds until a trial request is sent. (default: 30)
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        #: Current state: :attr:`CLOSED`, :attr:`OPEN` or :attr:`HALF_OPEN`
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise :class:`atomx.exceptions.CircuitOpenError` if no request may be sent."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and _now() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # let this request through as trial
+                return
+            raise CircuitOpenError('The api failed {} times in a row, not sending requests '
+                                   'for {} seconds.'.format(self.failures, self.reset_timeout))
+
+    def record(self, response=None, error=None):
+        """Record the outcome of a request."""
+        failed = error is not None or response.status_code >= 500
+        with self._lock:
+            if not failed:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = _now()
@@ -1,7 +1,62 @@
-import re
+import codecs
+import json
+from datetime import datetime, timedelta
+try:  # py3
+    from datetime import timezone as _timezone
+except ImportError:  # py2
+    _timezone = None
 from atomx import models
 
 
+def _convert_model_name(name):
+    """Converts ``name`` to the name of a model without checking that the model exists.
+    See :func:`get_model_name`.
+    """
+    if name.endswith('_list'):
+        name = name[:-5]
+    if '-' in name:
+        model_name = ''.join(m.capitalize() for m in name.split('-'))
+    elif '_' in name:
+        model_name = ''.join(m.capitalize() for m in name.split('_'))
+    else:
+        model_name = name.capitalize()
+
+    if model_name.endswith('ies'):  # change e.g. Countries to Countr*y*
+        model_name = model_name[:-3] + 'y'
+    if model_name in ['Suspicious', 'SspSuspicious']:
+        return 'SspSuspicious'
+    return model_name.rstrip('s')
+
+
+# name -> model name (or False) lookup tables, filled by :func:`_build_model_indexes`
+# and memoised for names that aren't precomputed.
+_MODEL_NAMES = {}
+_ATTRIBUTE_MODEL_NAMES = {}
+_ATTRIBUTE_SUFFIXES = ('_filter', '_include', '_exclude')
+
+
+def _build_model_indexes():
+    """Precompute the model name of the common spellings of all :mod:`atomx.models`
+    resource and attribute names.
+    """
+    valid = set(dir(models))
+    for model_name in models.__all__:
+        resource = model_name_to_rest(model_name)
+        names = set([resource, resource.replace('-', '_'), model_name])
+        plural = resource[:-1] + 'ies' if resource.endswith('y') else resource + 's'
+        names.update([plural, plural.replace('-', '_')])
+        names.update([n + '_list' for n in list(names)])
+        for name in names:
+            converted = _convert_model_name(name)
+            _MODEL_NAMES[name] = converted if converted in valid else False
+    for name, model_name in list(_MODEL_NAMES.items()):
+        _ATTRIBUTE_MODEL_NAMES[name] = model_name
+        for suffix in _ATTRIBUTE_SUFFIXES:
+            _ATTRIBUTE_MODEL_NAMES[name + suffix] = model_name
+    _ATTRIBUTE_MODEL_NAMES['suspicious'] = 'SspSuspicious'
+    _MODEL_NAMES[None] = False  # mark the indexes as built
+
+
 def get_model_name(name):
     """Checks that :param:`name` is a valid model.
     Converts plural `name` to capitalized singular form,
@@ -23,27 +78,23 @@ def get_model_name(name):
     >>> check_model_name('advertisers_list')
     "Advertiser"
 
+    Results are looked up in precomputed tables (and memoised for other names)
+    since this runs for every api response.
+
     :param str name: model name to convert
     :return: name of the model or False
     """
-    if name.endswith('_list'):
-        name = name[:-5]
-    if '-' in name:
-        model_name = ''.join(m.capitalize() for m in name.split('-'))
-    elif '_' in name:
-        model_name = ''.join(m.capitalize() for m in name.split('_'))
-    else:
-        model_name = name.capitalize()
-
-    if model_name.endswith('ies'):  # change e.g. Countries to Countr*y*
-        model_name = model_name[:-3] + 'y'
-    if model_name in ['Suspicious', 'SspSuspicious']:
-        return 'SspSuspicious'
-    else:
-        model_name = model_name.rstrip('s')
-    if model_name in dir(models):
-        return model_name
-    return False
+    try:
+        return _MODEL_NAMES[name]
+    except KeyError:
+        if None not in _MODEL_NAMES:
+            _build_model_indexes()
+            if name in _MODEL_NAMES:
+                return _MODEL_NAMES[name]
+    model_name = _convert_model_name(name)
+    model_name = model_name if model_name in dir(models) else False
+    _MODEL_NAMES[name] = model_name
+    return model_name
 
 
 def get_attribute_model_name(attribute):
@@ -53,9 +104,33 @@ def get_attribute_model_name(attribute):
     :param str attribute: attribute name to convert
     :return: name of the model or False
     """
+    try:
+        return _ATTRIBUTE_MODEL_NAMES[attribute]
+    except KeyError:
+        pass
     if attribute.lower() == 'suspicious':
-        return 'SspSuspicious'
-    return get_model_name(re.sub('(_filter|_include|_exclude)$', '', attribute))
+        model_name = 'SspSuspicious'
+    else:
+        name = attribute
+        for suffix in _ATTRIBUTE_SUFFIXES:
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+                break
+        model_name = get_model_name(name)
+    _ATTRIBUTE_MODEL_NAMES[attribute] = model_name
+    return model_name
+
+
+def get_model(name):
+    """Like :func:`get_model_name` but returns the model class or `None`."""
+    model_name = get_model_name(name)
+    return getattr(models, model_name) if model_name else None
+
+
+def get_attribute_model(attribute):
+    """Like :func:`get_attribute_model_name` but returns the model class or `None`."""
+    model_name = get_attribute_model_name(attribute)
+    return getattr(models, model_name) if model_name else None
 
 
 def model_name_to_rest(name):
@@ -78,6 +153,132 @@ def model_name_to_rest(name):
     return r.lower()
 
 
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '.eE+-0123456789'
+
+
+class _JSONStream(object):
+    """Incrementally decodes json from an iterable of byte ``chunks``."""
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        """Append the next chunk to the buffer. Returns `False` at the end of the stream."""
+        if self.eof:
+            return False
+        # drop everything that is already decoded
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer += self.decoder.decode(chunk)
+                return True
+        self.buffer += self.decoder.decode(b'', final=True)
+        self.eof = True
+        return True
+
+    def next_char(self):
+        """Skip whitespace and return the next character (without consuming it)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                raise ValueError('Unexpected end of json stream')
+
+    def expect(self, chars):
+        char = self.next_char()
+        if char not in chars:
+            raise ValueError('Expected {!r} at position {} but got {!r}'.format(
+                chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode and consume the next complete json value."""
+        self.next_char()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self._read():
+                    continue
+                raise
+            # a number at the end of the buffer might continue in the next chunk,
+            # e.g. `12.` + `5` or `1e` + `-3`
+            if not self.eof and self.buffer[self.pos] in _NUMBER_CHARS and \
+                    (end >= len(self.buffer) - 1 or self.buffer[end] in _NUMBER_CHARS):
+                self._read()
+                continue
+            if end == len(self.buffer) and not self.eof and self._read():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_object(chunks):
+    """Incrementally decode the json object in the byte ``chunks``.
+
+    Yields ``('value', key, value)`` for the members of the object and
+    ``('item', key, item)`` for every item of members that are arrays,
+    so large arrays never have to be held in memory as a whole.
+
+    :param chunks: iterable of :class:`bytes`, e.g. :meth:`requests.Response.iter_content`.
+    :return: generator of ``(event, key, value)`` tuples
+    """
+    stream = _JSONStream(chunks)
+    stream.expect('{')
+    if stream.next_char() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if stream.next_char() == '[':
+            stream.pos += 1
+            if stream.next_char() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    yield 'item', key, stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            yield 'value', key, stream.value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def utcnow():
+    """Returns the current UTC time as naive :class:`datetime.datetime`
+    like the times of reports.
+    """
+    if _timezone is None:
+        return datetime.utcnow()
+    return datetime.now(_timezone.utc).replace(tzinfo=None)
+
+
+def current_hour(timezone='UTC'):
+    """Returns the start of the current hour for reports in ``timezone``.
+
+    Only `UTC` is resolved exactly. For any other timezone the latest current
+    hour of all timezones (UTC+14) is returned, so a report that ends before
+    it never includes the current hour.
+
+    :param str timezone: Report timezone. (default: `UTC`)
+    :return: :class:`datetime.datetime` of the current hour.
+    """
+    now = utcnow()
+    if timezone != 'UTC':
+        now += timedelta(hours=14)
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
 class _class_property(object):
     """Decorator to create @classmethod and @property"""
     def __init__(self, f):
@@ -0,0 +1,124 @@
+"""End to end benchmarks of :class:`atomx.Atomx` against the local mock api
+of :mod:`benchmarks.mock_server`.
+
+Run from the repository root with ``python -m benchmarks.bench_client``.
+The report benchmark needs :mod:`pandas`.
+"""
+from __future__ import print_function
+
+import importlib.util
+import time
+import tracemalloc
+
+from benchmarks.mock_server import serve
+
+#: Seconds the mock api waits before answering each request
+LATENCY = 0.002
+
+
+def session(server, **kwargs):
+    from atomx import Atomx
+    return Atomx('user@example.com', 'password', api_endpoint=server.endpoint, **kwargs)
+
+
+def timed(f, repeat=3):
+    """Returns the best time of ``repeat`` calls of ``f`` in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        f()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def list_decoding(n=20000):
+    """Throughput and memory of decoding a list response of ``n`` domains."""
+    with serve(size=n) as server:
+        api = session(server)
+        seconds = timed(lambda: api.get('domains'))
+        tracemalloc.start()
+        domains = api.get('domains')
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {'models/s': len(domains) / seconds, 'peak bytes/model': peak / float(len(domains))}
+
+
+def lazy_loads(n=200):
+    """Lazy loaded attributes per second (one request per model)."""
+    with serve(latency=LATENCY, size=n) as server:
+        api = session(server)
+
+        def run():
+            for campaign in api.get('campaigns'):
+                campaign.profile
+        seconds = timed(run)
+    return {'lazy loads/s': n / seconds}
+
+
+def search(n=100):
+    """Search requests per second."""
+    with serve(latency=LATENCY, size=100) as server:
+        api = session(server)
+
+        def run():
+            for _ in range(n):
+                api.search('domain')
+        seconds = timed(run)
+    return {'searches/s': n / seconds}
+
+
+def report(rows=100000):
+    """Seconds to create a report of ``rows`` rows and convert it to pandas."""
+    from datetime import datetime
+    with serve(size=10, report_size=rows) as server:
+        api = session(server)
+
+        def create():
+            return api.report(scope='advertisers', groups=['hour', 'site_id', 'placement_id'],
+                              metrics=['impressions', 'clicks', 'revenue'],
+                              from_=datetime(2016, 1, 1), to=datetime(2016, 1, 29))
+        result = {'Atomx.report': timed(create)}
+        if importlib.util.find_spec('pandas') is None:
+            return result
+        result['Atomx.report + Report.pandas'] = timed(lambda: create().pandas)
+    return result
+
+
+def bulk_save(n=500):
+    """Saved models per second with :meth:`atomx.Atomx.bulk_save`."""
+    with serve(latency=LATENCY, size=n) as server:
+        api = session(server)
+        campaigns = api.get('campaigns')
+
+        def run():
+            for campaign in campaigns:
+                campaign.budget += 1
+            api.bulk_save(campaigns).raise_for_errors()
+
+        def sequential():
+            for campaign in campaigns[:n // 5]:
+                campaign.budget += 1
+                campaign.save()
+        return {'bulk_save models/s': n / timed(run),
+                'save() models/s': n // 5 / timed(sequential)}
+
+
+def results():
+    """Returns a list of ``(group, {name: value}, unit)``."""
+    return [('list decoding (20k domains)', list_decoding(), ''),
+            ('lazy loads', lazy_loads(), ''),
+            ('search', search(), ''),
+            ('report (100k rows)', report(), 's'),
+            ('bulk save', bulk_save(), '')]
+
+
+def main():
+    for name, values, unit in results():
+        print(name)
+        for key, value in sorted(values.items()):
+            print('    {:<30} {:12.3f} {}'.format(key, value, unit))
+
+
+if __name__ == '__main__':
+    main()
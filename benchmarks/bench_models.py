@@ -0,0 +1,109 @@
+"""Micro-benchmarks for :mod:`atomx.models` decoding and attribute access.
+
+Run from the repository root with ``python -m benchmarks.bench_models``.
+"""
+from __future__ import print_function
+
+import json
+import timeit
+import tracemalloc
+
+
+def bench(stmt, setup='pass', number=100000, repeat=5, **namespace):
+    """Returns the best time per call of ``stmt`` in microseconds."""
+    timer = timeit.Timer(stmt, setup, globals=namespace)
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def model_name_lookup():
+    from atomx.utils import get_model_name, get_attribute_model_name
+    return {
+        'get_model_name': bench("get_model_name('operating-systems')",
+                                get_model_name=get_model_name),
+        'get_attribute_model_name': bench("get_attribute_model_name('domains_filter')",
+                                          get_attribute_model_name=get_attribute_model_name),
+    }
+
+
+def attribute_access():
+    from atomx.models import Campaign
+    campaign = Campaign(id=1, name='campaign', budget=10.0, profile={'id': 2, 'name': 'p'},
+                        created_at='2016-01-01T00:00:00')
+    return {
+        'model attribute': bench('campaign.budget', campaign=campaign),
+        'related model attribute': bench('campaign.profile', campaign=campaign),
+    }
+
+
+def domain_payload(n):
+    """Returns the decoded json of a `/domains` response with ``n`` domains."""
+    return json.loads(json.dumps([
+        {'id': i, 'hostname': 'domain{}.example.com'.format(i), 'state': 'ACTIVE',
+         'network_id': 1, 'category_id': 3, 'created_at': '2016-01-01T00:00:00',
+         'updated_at': '2016-02-01T00:00:00'} for i in range(n)]))
+
+
+def memory_per_model(n=100000):
+    """Returns the bytes allocated per model when decoding ``n`` domains."""
+    from atomx.models import Domain
+    payload = domain_payload(n)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    domains = [Domain(**d) for d in payload]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del payload
+    return {'Domain': (after - before) / float(len(domains))}
+
+
+def _eager_dates(attributes):
+    """Date parsing of atomx <= 1.7 that converted all dates on model construction."""
+    from datetime import datetime
+    for k, v in attributes.items():
+        if k.endswith('_at'):
+            try:
+                attributes[k] = datetime.strptime(v, '%Y-%m-%dT%H:%M:%S')
+            except (ValueError, TypeError):
+                pass
+        elif k == 'date':
+            try:
+                attributes[k] = datetime.strptime(v, '%Y-%m-%d')
+            except (ValueError, TypeError):
+                pass
+    return attributes
+
+
+def decoding(n=100000):
+    """Returns the time per model in microseconds to decode ``n`` domains."""
+    from atomx.models import Domain
+    payload = domain_payload(n)
+
+    def run(f):
+        return bench('f()', number=1, repeat=3, f=f) / n
+
+    return {
+        'lazy dates': run(lambda: [Domain(**d) for d in payload]),
+        'lazy dates, all accessed': run(lambda: [(m.created_at, m.updated_at) for m in
+                                                 [Domain(**d) for d in payload]]),
+        'eager dates (<= 1.7)': run(lambda: [Domain(**_eager_dates(dict(d)))
+                                             for d in payload]),
+    }
+
+
+def results():
+    """Returns a list of ``(group, {name: value}, unit)``."""
+    return [('model name lookup', model_name_lookup(), 'us'),
+            ('attribute access', attribute_access(), 'us'),
+            ('decoding per model', decoding(), 'us'),
+            ('memory per model', memory_per_model(), 'bytes')]
+
+
+def main():
+    for name, values, unit in results():
+        print(name)
+        for key, value in sorted(values.items()):
+            print('    {:<30} {:8.3f} {}'.format(key, value, unit))
+
+
+if __name__ == '__main__':
+    main()
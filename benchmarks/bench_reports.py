@@ -0,0 +1,68 @@
+"""Benchmarks for converting :class:`atomx.models.Report` results.
+
+Run from the repository root with ``python -m benchmarks.bench_reports``.
+Needs :mod:`numpy` and :mod:`pandas`.
+"""
+from __future__ import print_function
+
+import json
+import time
+
+
+def report_rows(n):
+    """Returns the decoded json rows of an hourly report by site and placement."""
+    return json.loads(json.dumps([
+        ['2016-01-{:02d} {:02d}:00:00'.format(i // 24 % 28 + 1, i % 24),
+         i % 500, i % 3000, i * 3, i % 17, i * 0.0013] for i in range(n)]))
+
+
+def make_report(n):
+    from atomx.models import Report
+    return Report(id='benchmark', data=report_rows(n), length=n,
+                  columns=['hour', 'site_id', 'placement_id', 'impressions', 'clicks',
+                           'revenue'],
+                  query={'groups': ['hour', 'site_id', 'placement_id'],
+                         'metrics': ['impressions', 'clicks', 'revenue']})
+
+
+def conversion(n=500000):
+    """Returns the seconds to convert a report with ``n`` rows."""
+    def pandas():
+        report = make_report(n)
+        start = time.time()
+        report.pandas
+        return time.time() - start
+
+    def to_pandas():
+        report = make_report(n)
+        start = time.time()
+        report.to_pandas()
+        return time.time() - start
+
+    def to_numpy():
+        report = make_report(n)
+        start = time.time()
+        report.to_numpy()
+        return time.time() - start
+
+    return {
+        'Report.pandas': min(pandas() for _ in range(3)),
+        'Report.to_pandas': min(to_pandas() for _ in range(3)),
+        'Report.to_numpy': min(to_numpy() for _ in range(3)),
+    }
+
+
+def results():
+    """Returns a list of ``(group, {name: value}, unit)``."""
+    return [('report conversion (500k rows)', conversion(), 's')]
+
+
+def main():
+    for name, values, unit in results():
+        print(name)
+        for key, value in sorted(values.items()):
+            print('    {:<30} {:8.3f} {}'.format(key, value, unit))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Default routes of the :class:`atomx.testing.MockAPIServer` for the benchmarks.
+
+Start it with default routes for benchmarks::
+
+    >>> with serve(latency=0.005, size=1000) as server:
+    ...     atomx = Atomx('user@example.com', 'password', api_endpoint=server.endpoint)
+"""
+import re
+from contextlib import contextmanager
+
+from atomx import testing
+from atomx.testing import resource_response
+
+
+def domain(i):
+    return {'id': i, 'hostname': 'domain{}.example.com'.format(i), 'state': 'ACTIVE',
+            'network_id': 1, 'category_id': 3, 'created_at': '2016-01-01T00:00:00',
+            'updated_at': '2016-02-01T00:00:00'}
+
+
+def campaign(i):
+    return {'id': i, 'name': 'campaign {}'.format(i), 'state': 'ACTIVE', 'budget': 100.0,
+            'advertiser_id': 1, 'profile': i, 'creatives': [i, i + 1],
+            'created_at': '2016-01-01T00:00:00', 'updated_at': '2016-02-01T00:00:00'}
+
+
+def report_rows(n):
+    return [['2016-01-{:02d} {:02d}:00:00'.format(i // 24 % 28 + 1, i % 24),
+             i % 500, i % 3000, i * 3, i % 17, i * 0.0013] for i in range(n)]
+
+
+def install_default_routes(server, size=1000, report_size=10000):
+    """Add routes for the resources used by the benchmarks to ``server``.
+
+    - `GET domains` and `GET campaigns` with ``size`` models (`limit`/`offset` supported),
+    - `GET`/`PUT` `campaign/<id>`, `GET campaign/<id>/profile`, `GET profile/<id>`,
+    - `GET search`,
+    - `POST report` and `GET report/<id>` with ``report_size`` rows.
+    """
+    domains = [domain(i) for i in range(size)]
+    campaigns = [campaign(i) for i in range(size)]
+
+    def listing(resource, models):
+        def route(params, body, headers):
+            offset = int(params.get('offset', 0))
+            limit = int(params.get('limit', len(models)))
+            return 200, resource_response(resource, models[offset:offset + limit],
+                                          count=len(models))
+        return route
+
+    server.routes[('GET', '/v3/domains')] = listing('domains', domains)
+    server.routes[('GET', '/v3/campaigns')] = listing('campaigns', campaigns)
+    server.routes[('GET', '/v3/search')] = lambda params, body, headers: (200, {
+        'success': True, 'search': {'campaigns': campaigns[:20], 'domains': domains[:20]}})
+
+    rows = report_rows(report_size)
+    report = {'id': 'benchmark', 'length': len(rows), 'totals': {},
+              'columns': ['hour', 'site_id', 'placement_id', 'impressions', 'clicks',
+                          'revenue'],
+              'query': {'groups': ['hour', 'site_id', 'placement_id'],
+                        'metrics': ['impressions', 'clicks', 'revenue']},
+              'from': '2016-01-01 00:00:00', 'to': '2016-01-29 00:00:00'}
+
+    def get_report(params, body, headers, id):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', len(rows)))
+        return 200, resource_response('report', dict(report, data=rows[offset:offset + limit]))
+
+    server.routes[('POST', '/v3/report')] = lambda params, body, headers: (
+        200, resource_response('report', dict(report, data=rows)))
+    server.patterns += [
+        ('GET', re.compile(r'^/v3/report/(\w+)$'), get_report),
+        ('GET', re.compile(r'^/v3/campaign/(\d+)$'), lambda params, body, headers, id: (
+            200, resource_response('campaign', campaign(int(id))))),
+        ('PUT', re.compile(r'^/v3/campaign/(\d+)$'), lambda params, body, headers, id: (
+            200, resource_response('campaign', dict(campaign(int(id)), **body)))),
+        ('GET', re.compile(r'^/v3/campaign/(\d+)/profile$'), lambda params, body, headers, id: (
+            200, resource_response('profile', {'id': int(id), 'name': 'profile'}))),
+        ('GET', re.compile(r'^/v3/profile/(\d+)$'), lambda params, body, headers, id: (
+            200, resource_response('profile', {'id': int(id), 'name': 'profile'}))),
+    ]
+    return server
+
+
+@contextmanager
+def serve(latency=0, size=None, report_size=10000):
+    """Like :func:`atomx.testing.serve` with the routes of :func:`install_default_routes`.
+
+    :param float latency: Seconds to wait before answering each request.
+    :param int size: If set, :func:`install_default_routes` with ``size`` models.
+    :param int report_size: Number of report rows of the default routes.
+    """
+    with testing.serve(latency=latency) as server:
+        if size is not None:
+            install_default_routes(server, size=size, report_size=report_size)
+        yield server
@@ -0,0 +1,108 @@
+"""Run all benchmarks and track the results across versions.
+
+Run from the repository root with ``python -m benchmarks.run``.
+
+Each run is appended as one json line (with the atomx version, git commit and
+python version) to the results file (default: ``benchmarks/results.jsonl``)
+and compared with the previous run, so regressions are visible::
+
+    $ python -m benchmarks.run --compare-version 1.7
+"""
+from __future__ import print_function
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+SUITES = ('bench_models', 'bench_reports', 'bench_client')
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(suites=SUITES):
+    """Returns ``{'group: name': [value, unit]}`` of all benchmarks in ``suites``."""
+    results = {}
+    for suite in suites:
+        module = importlib.import_module('benchmarks.' + suite)
+        try:
+            groups = module.results()
+        except ImportError as e:  # optional dependency (e.g. numpy, pandas) missing
+            print('skipping {}: {}'.format(suite, e), file=sys.stderr)
+            continue
+        for group, values, unit in groups:
+            for name, value in values.items():
+                results['{}: {}'.format(group, name)] = [value, unit]
+    return results
+
+
+def load(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def higher_is_better(key):
+    return '/s' in key
+
+
+def compare(current, previous, threshold):
+    """Print ``current`` next to ``previous`` results and return the regressed keys."""
+    regressions = []
+    print('{:<60} {:>12} {:>12} {:>8}'.format(
+        'benchmark', previous['version'] if previous else '', 'current', 'change'))
+    for key, (value, unit) in sorted(current['results'].items()):
+        before = previous['results'].get(key, [None])[0] if previous else None
+        if not before:
+            print('{:<60} {:>12} {:>12.3f} {}'.format(key, '', value, unit))
+            continue
+        change = (value - before) / before
+        worse = -change if higher_is_better(key) else change
+        flag = '  <-- regression' if worse > threshold else ''
+        if flag:
+            regressions.append(key)
+        print('{:<60} {:>12.3f} {:>12.3f} {:>+7.1%} {}{}'.format(
+            key, before, value, change, unit, flag))
+    return regressions
+
+
+def main(argv=None):
+    from atomx import __version__
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help='Only run this suite (can be repeated).')
+    parser.add_argument('--output', default=RESULTS, help='Results file (json lines).')
+    parser.add_argument('--compare-version', help='Compare with the last run of this version '
+                        'instead of the previous run.')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative change that counts as regression. (default: 0.1)')
+    parser.add_argument('--no-save', action='store_true', help="Don't append the results.")
+    args = parser.parse_args(argv)
+
+    history = load(args.output)
+    current = {'version': __version__, 'commit': git_commit(),
+               'python': platform.python_version(), 'time': time.time(),
+               'results': run(args.suite or SUITES)}
+    candidates = [h for h in history
+                  if args.compare_version is None or h['version'] == args.compare_version]
+    regressions = compare(current, candidates[-1] if candidates else None, args.threshold)
+    if not args.no_save:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(current, sort_keys=True) + '\n')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
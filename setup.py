@@ -11,9 +11,10 @@ with open(path.join(here, 'atomx', 'version.py')) as f:
 
 requires = [
     'requests',
+    'futures; python_version < "3"',
 ]
 extra_require = {
-    'report': ['ipython[notebook]', 'pandas', 'matplotlib'],
+    'report': ['ipython[notebook]', 'pandas', 'matplotlib', 'numpy', 'pyarrow'],
     'test': ['pytest'],
     'docs': ['sphinx'],
 }
@@ -25,7 +26,7 @@ setup(
     description='python interface for the atomx api on https://api.atomx.com',
     long_description=README,
 
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     exclude_package_data={'': ['.gitignore']},
     zip_safe=True,
 
@@ -1,5 +1,9 @@
+import threading
+
 import pytest
 
+from atomx.testing import serve, resource_response
+
 
 @pytest.fixture(scope="session")
 def atomx():
@@ -26,3 +30,1003 @@ def test_create(atomx):
     profile.create(atomx)
     profile_new = atomx.get('profile', id=profile.id)
     assert profile.name == profile_new.name
+
+
+# Tests against a local stand-in for the atomx api
+# ------------------------------------------------
+
+@pytest.fixture
+def mock_server():
+    with serve() as server:
+        yield server
+
+
+@pytest.fixture
+def api(mock_server):
+    from atomx import Atomx
+    session = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint)
+    yield session
+    session.close()
+
+
+def test_transport_reuses_connections(mock_server, api):
+    mock_server.routes[('GET', '/v3/advertiser/1')] = lambda params, body, headers: (
+        200, resource_response('advertiser', {'id': 1, 'name': 'test'}))
+    for _ in range(20):
+        assert api.get('advertiser', 1).name == 'test'
+    # login and all 20 requests share one keep-alive connection
+    assert len(mock_server.requests) == 21
+    assert mock_server.connections == 1
+
+
+def test_transport_is_pluggable(mock_server):
+    from atomx import Atomx
+    from atomx.transport import RequestsTransport
+
+    class CountingTransport(RequestsTransport):
+        calls = 0
+
+        def request(self, method, url, **kwargs):
+            CountingTransport.calls += 1
+            return super(CountingTransport, self).request(method, url, **kwargs)
+
+    session = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                    transport=CountingTransport(pool_maxsize=1))
+    assert session.transport.calls == 1
+    assert session.user.id == 1
+
+
+def test_async_client(mock_server):
+    import asyncio
+    from atomx import models
+    from atomx.aio import AsyncAtomx
+
+    campaigns = dict((i, {'id': i, 'name': 'campaign {}'.format(i), 'budget': 10.0})
+                     for i in range(1, 31))
+    for i in campaigns:
+        mock_server.routes[('GET', '/v3/campaign/{}'.format(i))] = \
+            lambda params, body, headers, i=i: (200, resource_response('campaign', campaigns[i]))
+
+    def put_campaign(params, body, headers):
+        campaigns[3].update(body)
+        return 200, resource_response('campaign', campaigns[3])
+    mock_server.routes[('PUT', '/v3/campaign/3')] = put_campaign
+
+    async def run():
+        async with AsyncAtomx('user@example.com', 'password', max_concurrency=5,
+                              api_endpoint=mock_server.endpoint) as atomx:
+            assert atomx.user.id == 1
+            result = await asyncio.gather(*[atomx.get('campaign', i) for i in campaigns])
+            assert [c.id for c in result] == list(campaigns)
+            assert all(isinstance(c, models.Campaign) for c in result)
+
+            campaign = result[2]
+            campaign.budget = 20.0
+            await campaign.asave()
+            assert campaign.budget == 20.0
+            with pytest.raises(AttributeError):
+                campaign.profile  # no implicit blocking request
+            campaign = models.Campaign(session=atomx, id=1, profile=5)
+            with pytest.raises(AttributeError, match='atomx.get'):
+                campaign.profile  # referenced models aren't returned as ids either
+            assert campaign.json['profile'] == 5
+
+    asyncio.run(run())
+    # at most `max_concurrency` connections were opened
+    assert mock_server.connections <= 5
+
+
+def domains_route(domains, with_count=True, max_limit=None):
+    def route(params, body, headers):
+        offset = int(params.get('offset', 0))
+        limit = min(int(params.get('limit', 100)), max_limit or float('inf'))
+        meta = {'count': len(domains)} if with_count else {}
+        meta.update(offset=offset, limit=limit)
+        return 200, resource_response('domains', domains[offset:offset + limit], **meta)
+    return route
+
+
+@pytest.mark.parametrize('with_count', [True, False])
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_iter_pages(mock_server, api, with_count, prefetch):
+    from atomx.models import Domain
+    domains = [{'id': i, 'hostname': 'd{}.com'.format(i)} for i in range(250)]
+    mock_server.routes[('GET', '/v3/domains')] = domains_route(domains, with_count)
+
+    result = list(api.iter('domains', page_size=100, prefetch=prefetch, hostname='*'))
+    assert [d.id for d in result] == list(range(250))
+    assert isinstance(result[0], Domain)
+    offsets = [int(params['offset']) for _, path, params in mock_server.requests
+               if path == '/v3/domains']
+    assert offsets == [0, 100, 200]
+    assert all(params['hostname'] == '*' for _, path, params in mock_server.requests
+               if path == '/v3/domains')
+
+    mock_server.requests[:] = []
+    assert len(list(api.iter('domains', page_size=100, offset=20, limit=110))) == 110
+    assert [(params['offset'], params['limit']) for _, _, params in mock_server.requests] == \
+        [('20', '100'), ('120', '10')]
+
+
+def test_get_all_parallel(mock_server, api):
+    from atomx.exceptions import APIError
+    domains = [{'id': i, 'hostname': 'd{}.com'.format(i)} for i in range(1050)]
+    mock_server.routes[('GET', '/v3/domains')] = domains_route(domains)
+
+    result = api.get_all('domains', workers=4, page_size=100)
+    assert [d.id for d in result] == list(range(1050))
+    assert len(mock_server.requests) == 1 + 11
+
+    # the api caps the number of models per request
+    mock_server.routes[('GET', '/v3/domains')] = domains_route(domains, max_limit=100)
+    result = api.get_all('domains', workers=4, page_size=500)
+    assert [d.id for d in result] == list(range(1050))
+
+    def short_page_route(params, body, headers):
+        if params['offset'] == '200':
+            params['limit'] = '50'
+        return domains_route(domains)(params, body, headers)
+    mock_server.routes[('GET', '/v3/domains')] = short_page_route
+    result = api.get_all('domains', workers=4, page_size=100)
+    assert [d.id for d in result] == list(range(1050))
+
+    def failing_route(params, body, headers):
+        if params['offset'] == '300':
+            return 500, {'success': False, 'error': 'Internal error'}
+        return domains_route(domains)(params, body, headers)
+    mock_server.routes[('GET', '/v3/domains')] = failing_route
+    with pytest.raises(APIError):
+        api.get_all('domains', workers=2, page_size=100)
+
+
+def id_filter_route(resource, records):
+    def route(params, body, headers):
+        ids = [int(i) for i in params['id'].split(',')]
+        return 200, resource_response(resource, [records[i] for i in ids if i in records])
+    return route
+
+
+def test_prefetch(mock_server, api):
+    from atomx.models import Campaign, Advertiser, Domain
+    campaigns = [Campaign(session=api, id=i, advertiser=i % 3 + 1, profile=i + 100)
+                 for i in range(10)]
+    advertisers = dict((i, {'id': i, 'name': 'adv {}'.format(i)}) for i in range(1, 4))
+    profiles = dict((i + 100, {'id': i + 100, 'domains_filter': [1, 2]}) for i in range(10))
+    domains = dict((i, {'id': i, 'hostname': 'd{}.com'.format(i)}) for i in range(1, 3))
+    mock_server.routes[('GET', '/v3/advertiser')] = id_filter_route('advertisers', advertisers)
+    mock_server.routes[('GET', '/v3/profile')] = id_filter_route('profiles', profiles)
+    mock_server.routes[('GET', '/v3/domain')] = id_filter_route('domains', domains)
+
+    api.prefetch(campaigns, 'advertiser', 'profile.domains_filter', chunk_size=4)
+    # 1 advertiser request, 3 profile requests (10 ids in chunks of 4), 1 domain request
+    assert len(mock_server.requests) == 1 + 1 + 3 + 1
+    mock_server.requests[:] = []
+    assert isinstance(campaigns[0].advertiser, Advertiser)
+    assert [c.advertiser.id for c in campaigns] == [i % 3 + 1 for i in range(10)]
+    assert campaigns[5].profile.id == 105
+    assert all(isinstance(d, Domain) for d in campaigns[5].profile.domains_filter)
+    assert not mock_server.requests
+    assert not campaigns[0]._dirty
+
+
+def test_query(mock_server, api):
+    from atomx.models import Campaign
+    campaigns = dict((i, {'id': i, 'name': 'c{}'.format(i), 'budget': float(i),
+                          'state': 'ACTIVE' if i % 2 else 'INACTIVE'}) for i in range(10))
+
+    def campaign_route(params, body, headers):
+        records = [campaigns[int(i)] for i in params['id'].split(',')] if 'id' in params \
+            else [c for c in campaigns.values() if c['state'] == params.get('state', c['state'])]
+        if 'attributes' in params:
+            fields = params['attributes'].split(',')
+            records = [dict((f, r[f]) for f in fields) for r in records]
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', len(records)))
+        return 200, resource_response('campaigns', records[offset:offset + limit],
+                                      count=len(records))
+    mock_server.routes[('GET', '/v3/campaign')] = campaign_route
+
+    query = api.query(Campaign).only('budget').filter(state='ACTIVE')
+    assert query.params() == {'state': 'ACTIVE', 'attributes': 'id,budget'}
+    result = query.all()
+    assert [c.budget for c in result] == [1.0, 3.0, 5.0, 7.0, 9.0]
+    assert all(c.is_partial for c in result)
+    assert 'name' not in result[0].json
+    mock_server.requests[:] = []
+
+    result[0].budget = 2.0
+    assert result[3].name == 'c7'  # loads all models of the result with one request
+    assert len(mock_server.requests) == 1
+    assert mock_server.requests[0][2]['id'] == '1,3,5,7,9'
+    assert not any(c.is_partial for c in result)
+    assert [c.name for c in result] == ['c1', 'c3', 'c5', 'c7', 'c9']
+    assert result[0].budget == 2.0  # local changes are kept
+    assert result[0]._dirty == {'budget'}
+    assert len(mock_server.requests) == 1
+
+    assert api.query('campaign').get(4).name == 'c4'
+    assert not api.query(Campaign).filter(id=[2, 4]).first().is_partial
+
+
+def test_model_cache(mock_server):
+    from atomx import Atomx
+    from atomx.cache import ModelCache
+    countries = {1: {'id': 1, 'name': 'Austria'}, 2: {'id': 2, 'name': 'Malaysia'}}
+    for i in countries:
+        mock_server.routes[('GET', '/v3/country/{}'.format(i))] = \
+            lambda params, body, headers, i=i: (200, resource_response('country', countries[i]))
+    mock_server.routes[('GET', '/v3/campaign/7')] = lambda params, body, headers: (
+        200, resource_response('campaign', {'id': 7, 'country': 1, 'budget': 1.0}))
+    mock_server.routes[('PUT', '/v3/campaign/7')] = lambda params, body, headers: (
+        200, resource_response('campaign', dict({'id': 7, 'country': 1}, **body)))
+
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                model_cache=ModelCache(maxsize=2))
+    country = api.get('country', 1)
+    assert api.get('country/1') is country
+    campaign = api.get('campaign', 7)
+    assert campaign.country is country  # lazy load from the cache
+    assert len(mock_server.requests) == 1 + 2
+    assert api.model_cache.stats() == {'hits': 2, 'misses': 2, 'evictions': 0, 'size': 2}
+    mock_server.routes[('GET', '/v3/campaign/search')] = lambda params, body, headers: (
+        200, resource_response('campaigns', []))
+    api.get('campaign/search')  # not a model path, no cache lookup
+    assert api.model_cache.misses == 2
+
+    # saving invalidates the cached model
+    campaign.budget = 2.0
+    campaign.save()
+    assert api.model_cache.get('campaign', 7) is None
+
+    # least recently used models get evicted
+    api.get('country', 2)
+    api.get('campaign', 7)
+    assert api.model_cache.get('country', 1) is None
+    assert api.model_cache.evictions == 1
+
+
+def test_disk_cache(mock_server, tmp_path):
+    from atomx import Atomx
+    from atomx.cache import DiskCache
+    countries = [{'id': 1, 'name': 'Austria'}, {'id': 2, 'name': 'Malaysia'}]
+
+    def countries_route(params, body, headers):
+        if headers.get('If-None-Match') == '"v1"':
+            return 304, None, {'ETag': '"v1"'}
+        return 200, resource_response('countries', countries), {'ETag': '"v1"'}
+    mock_server.routes[('GET', '/v3/countries')] = countries_route
+
+    path = str(tmp_path / 'cache.sqlite')
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                disk_cache=DiskCache(path))
+    assert [c.name for c in api.get('countries')] == ['Austria', 'Malaysia']
+    # a new session (e.g. in another worker process) uses the cached response
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                disk_cache=DiskCache(path))
+    assert [c.name for c in api.get('countries')] == ['Austria', 'Malaysia']
+    assert [p for _, p, _ in mock_server.requests].count('/v3/countries') == 1
+
+    # stale responses get revalidated
+    api.disk_cache.max_age = None
+    assert [c.name for c in api.get('countries')] == ['Austria', 'Malaysia']
+    assert [p for _, p, _ in mock_server.requests].count('/v3/countries') == 2
+    assert api.last_response['_headers']['ETag'] == '"v1"'
+
+
+def test_response_cache(mock_server):
+    from atomx import Atomx
+    version = {'etag': '"v1"', 'budget': 1.0}
+
+    def campaigns_route(params, body, headers):
+        if headers.get('If-None-Match') == version['etag']:
+            return 304, None, {'ETag': version['etag']}
+        return 200, resource_response('campaigns', [{'id': 1, 'budget': version['budget']}],
+                                      count=1), {'ETag': version['etag']}
+    mock_server.routes[('GET', '/v3/campaigns')] = campaigns_route
+
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                response_cache=True, stats=True)
+    campaigns = api.get('campaigns')
+    assert api.get('campaigns') is campaigns  # 304 returns the decoded models
+    assert api.last_response['count'] == 1
+    assert [c.budget for c in api.iter('campaigns')] == [1.0]  # pages have their own key
+    assert len(mock_server.requests) == 1 + 3
+    assert api.response_cache.stats() == {'hits': 1, 'misses': 2, 'evictions': 0,
+                                          'size': 2, 'hit_rate': 1 / 3.}
+
+    version.update(etag='"v2"', budget=2.0)
+    assert api.get('campaigns')[0].budget == 2.0
+    campaigns = api.get('campaigns')
+    campaigns[0].budget = 3.0
+    # models with unsaved changes aren't reused
+    assert api.get('campaigns') is not campaigns
+    assert api.get('campaigns')[0].budget == 2.0
+
+    stats = api.stats.as_dict()['requests']['GET campaigns']
+    assert stats['revalidations'] == 4
+    assert stats['not_modified'] == 3
+    assert stats['revalidation_hit_rate'] == 0.75
+    assert stats['statuses'] == {200: 4, 304: 3}
+    assert 'atomx_not_modified_total{method="GET",endpoint="campaigns"} 3' in \
+        api.stats.prometheus()
+
+    # a `304` without a cached response is requested again in full
+    def proxy_route(params, body, headers):
+        if headers.get('Cache-Control') != 'no-cache':
+            return 304, None, {'ETag': '"v2"'}
+        return campaigns_route(params, body, headers)
+    mock_server.routes[('GET', '/v3/campaigns')] = proxy_route
+    api.response_cache.clear()
+    assert api.get('campaigns')[0].budget == 2.0
+
+
+@pytest.mark.parametrize('name, model_name', [
+    ('countries', 'Country'), ('ADVERTISERS', 'Advertiser'),
+    ('conversion-pixels', 'ConversionPixel'), ('operating_system', 'OperatingSystem'),
+    ('InvalidModel', False), ('advertisers_list', 'Advertiser'),
+    ('suspicious', 'SspSuspicious'), ('reporting', False),
+])
+def test_get_model_name(name, model_name):
+    from atomx.utils import get_model_name, get_attribute_model_name
+    assert get_model_name(name) == model_name
+    assert get_model_name(name) == model_name  # memoised
+    assert get_attribute_model_name(name + '_filter') == model_name
+
+
+def test_compact_models():
+    import pickle
+    from atomx.models import Domain
+    domain = Domain(id=1, hostname='example.com', state='ACTIVE')
+    assert type(domain).__dictoffset__ == 0  # no instance __dict__
+    assert not domain._dirty
+    domain.hostname = 'atomx.com'
+    del domain.state
+    assert domain._dirty == set(['hostname', 'state'])
+    assert domain._dirty_json == {'hostname': 'atomx.com', 'state': None}
+    assert Domain(id=2)._dirty == set()  # other models are unchanged
+    assert 'hostname' in dir(domain)
+    assert pickle.loads(pickle.dumps(domain)).json == domain.json
+
+
+def test_lazy_dates():
+    from datetime import datetime
+    from atomx.models import Domain
+    domain = Domain(id=1, created_at='2016-01-02T03:04:05', date='2016-01-02',
+                    updated_at='invalid', deleted_at=None)
+    assert domain._attributes['created_at'] == '2016-01-02T03:04:05'  # not parsed yet
+    assert domain.created_at == datetime(2016, 1, 2, 3, 4, 5)
+    assert domain._attributes['created_at'] == datetime(2016, 1, 2, 3, 4, 5)  # cached
+    assert domain.updated_at == 'invalid'
+    assert domain.deleted_at is None
+    assert domain.json['date'] == datetime(2016, 1, 2)
+    assert not domain._dirty
+
+
+def test_iter_json_object_splits():
+    from atomx.utils import iter_json_object
+    payload = (b'{"resource": "ids", "count": 15, "rate": -1.5e-3, '
+               b'"ids": [12.5, 3, -0.25, 1E+2, 7e3, 42], "total": 6.02e23}')
+    expected = list(iter_json_object([payload]))
+    assert ('item', 'ids', 1e2) in expected and ('value', 'total', 6.02e23) in expected
+    for i in range(1, len(payload)):
+        assert list(iter_json_object([payload[:i], payload[i:]])) == expected
+    assert list(iter_json_object([payload[i:i + 1] for i in range(len(payload))])) == expected
+
+
+def test_stream(mock_server, api):
+    from atomx.models import Domain
+    domains = [{'id': i, 'hostname': 'd{}.com'.format(i)} for i in range(5000)]
+    mock_server.routes[('GET', '/v3/domains')] = domains_route(domains)
+    mock_server.routes[('GET', '/v3/domain/3')] = lambda params, body, headers: (
+        200, resource_response('domain', domains[3]))
+
+    result = api.stream('domains', limit=5000, chunk_size=1024)
+    assert api.last_response is None  # nothing requested until consumed
+    result = list(result)
+    assert [d.id for d in result] == list(range(5000))
+    assert isinstance(result[0], Domain)
+    assert api.last_response['count'] == 5000
+    assert 'domains' not in api.last_response
+
+    assert [d.hostname for d in api.stream('domain', 3)] == ['d3.com']
+
+    # only the `resource` array is streamed, even if it comes first
+    mock_server.routes[('GET', '/v3/domains')] = lambda params, body, headers: (200, dict(
+        [('domains', domains[:3]), ('campaigns', [{'id': 1}]),
+         ('resource', 'domains'), ('success', True)]))
+    result = list(api.stream('domains'))
+    assert [d.id for d in result] == [0, 1, 2]
+    assert isinstance(result[0], Domain)
+    assert api.last_response['campaigns'] == [{'id': 1}]
+
+
+def report_route(report, rows):
+    def route(params, body, headers):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', len(rows)))
+        return 200, resource_response('report', dict(report, data=rows[offset:offset + limit]))
+    return route
+
+
+def test_report_chunks(mock_server, api, tmp_path):
+    import csv
+    from atomx.models import Report
+    rows = [[i, i * 10] for i in range(2500)]
+    report_json = {'id': 'abc', 'columns': ['site_id', 'impressions'], 'length': len(rows),
+                   'query': {'groups': ['site_id'], 'metrics': ['impressions']}}
+    mock_server.routes[('GET', '/v3/report/abc')] = report_route(report_json, rows)
+
+    report = Report(session=api, **report_json)
+    assert list(report.iter_rows(chunk_size=1000)) == rows
+    assert [params['offset'] for _, _, params in mock_server.requests[1:]] == \
+        ['0', '1000', '2000']
+
+    path = str(tmp_path / 'report.csv')
+    assert report.download(path, chunk_size=1000) == len(rows)
+    with open(path) as f:
+        content = list(csv.reader(f))
+    assert content[0] == ['site_id', 'impressions']
+    assert content[1:] == [[str(c) for c in row] for row in rows]
+
+
+def test_report_pandas_chunks(mock_server, api):
+    pd = pytest.importorskip('pandas')
+    from atomx.models import Report
+    rows = [['2016-01-01 {:02d}:00:00'.format(i % 24), i] for i in range(100)]
+    report_json = {'id': 'abc', 'columns': ['hour', 'impressions'], 'length': len(rows),
+                   'query': {'groups': ['hour'], 'metrics': ['impressions']}}
+    mock_server.routes[('GET', '/v3/report/abc')] = report_route(report_json, rows)
+
+    df = Report(session=api, **report_json).pandas
+    assert len(df) == 100
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert list(df['impressions']) == list(range(100))
+    frames = list(Report(session=api, **report_json).iter_pandas(chunk_size=30))
+    assert [len(f) for f in frames] == [30, 30, 30, 10]
+
+
+def test_report_columnar():
+    np = pytest.importorskip('numpy')
+    from atomx.models import Report
+    rows = [['2016-01-01 {:02d}:00:00'.format(i % 24), i % 7 if i % 5 else None, 'US', i, 0.5]
+            for i in range(100)]
+    report = Report(id='abc', columns=['hour', 'site_id', 'country', 'impressions', 'revenue'],
+                    data=rows, length=len(rows),
+                    query={'groups': ['hour', 'site_id', 'country'],
+                           'metrics': ['impressions', 'revenue']})
+    columns = report.to_numpy(chunk_size=30)
+    assert list(columns) == report.columns
+    assert columns['hour'].dtype == np.dtype('datetime64[s]')
+    assert columns['site_id'].dtype == np.dtype('float64')  # has missing values
+    assert columns['impressions'].dtype == np.dtype('float64')
+    assert columns['country'].dtype == np.dtype(object)
+    assert list(columns['impressions']) == list(range(100))
+
+    pd = pytest.importorskip('pandas')
+    df = report.to_pandas()
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert (df['revenue'] == report.pandas['revenue']).all()
+
+    pytest.importorskip('pyarrow')
+    assert report.to_arrow().num_rows == 100
+
+
+def pending_report_route(report, rows, polls):
+    """Report that is ready after it was requested ``polls`` times."""
+    requested = []
+
+    def route(params, body, headers):
+        requested.append(params)
+        if len(requested) <= polls:
+            return 200, resource_response('report', dict(report, is_ready=False))
+        return report_route(dict(report, is_ready=True), rows)(params, body, headers)
+    return route
+
+
+def test_report_wait(mock_server, api):
+    import threading
+    from atomx.exceptions import ReportTimeoutError
+    from atomx.models import Report
+    from atomx.reporting import ReportPoller
+    rows = [[i, i * 10] for i in range(10)]
+    api._report_poller = ReportPoller(api, initial_delay=0.01, max_delay=0.05, jitter=0)
+    reports = []
+    for i in range(3):
+        report_json = {'id': 'r{}'.format(i), 'columns': ['site_id', 'impressions'],
+                       'query': {'groups': ['site_id'], 'metrics': ['impressions']}}
+        mock_server.routes[('GET', '/v3/report/r{}'.format(i))] = \
+            pending_report_route(dict(report_json, length=len(rows)), rows, polls=i + 1)
+        reports.append(Report(session=api, **report_json))
+    assert not any(r.is_ready for r in reports)
+
+    threads = [threading.Thread(target=r.wait, kwargs={'timeout': 5}) for r in reports]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(r.is_ready and r.length == len(rows) for r in reports)
+    # only the status was polled, the rows are requested when they are read
+    assert set(params['limit'] for _, _, params in mock_server.requests[1:]) == {'1'}
+    assert all(list(r.iter_rows()) == rows for r in reports)
+    assert len(api.report_poller) == 0
+
+    mock_server.routes[('GET', '/v3/report/slow')] = pending_report_route(
+        {'id': 'slow'}, rows, polls=1000)
+    with pytest.raises(ReportTimeoutError):
+        Report(id='slow', session=api).wait(timeout=0.1)
+    assert len(api.report_poller) == 0
+
+
+def test_report_wait_async(mock_server):
+    import asyncio
+    from atomx.aio import AsyncAtomx
+    from atomx.models import Report
+    from atomx.reporting import ReportPoller
+    rows = [[1, 10]]
+    mock_server.routes[('GET', '/v3/report/abc')] = pending_report_route(
+        {'id': 'abc', 'columns': ['site_id', 'impressions'], 'length': 1}, rows, polls=2)
+
+    async def run():
+        async with AsyncAtomx('user@example.com', 'password',
+                              api_endpoint=mock_server.endpoint) as atomx:
+            atomx._report_poller = ReportPoller(atomx, initial_delay=0.01, jitter=0)
+            report = await Report(id='abc', session=atomx).wait_async(timeout=5)
+            assert report.is_ready
+            assert report.data == rows
+    asyncio.run(run())
+
+
+def create_report_route(delay=0):
+    """Creates a ready report with one row per ``site_id`` for the posted query."""
+    import time
+
+    def route(params, body, headers):
+        time.sleep(delay)
+        columns = body.get('groups', []) + body.get('metrics', [])
+        rows = [[i if c == 'site_id' else i * 10 for c in columns] for i in range(3)]
+        return 200, resource_response('report', {
+            'id': 'r', 'columns': columns, 'data': rows, 'length': len(rows),
+            'query': body, 'from': body.get('from'), 'to': body.get('to')})
+    return route
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_report_cache(mock_server, tmp_path, on_disk):
+    from datetime import datetime, timedelta, timezone
+    from atomx import Atomx
+    from atomx.cache import ReportCache
+    mock_server.routes[('POST', '/v3/report')] = create_report_route(delay=0.2)
+    cache = ReportCache(str(tmp_path / 'reports.sqlite') if on_disk else None)
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                report_cache=cache)
+    closed = dict(scope='advertisers', from_=datetime(2016, 1, 1), to=datetime(2016, 2, 1))
+    report = api.report(groups=['site_id'], metrics=['impressions', 'clicks'],
+                        where=[['site_id', 'in', [2, 1]]], **closed)
+    again = api.report(groups=['site_id'], metrics=['clicks', 'impressions'],
+                       where=[['site_id', 'in', [1, 2]]], name='again', **closed)
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'shared': 0, 'size': 1}
+    assert report.columns == ['site_id', 'impressions', 'clicks']
+    assert again.columns == ['site_id', 'clicks', 'impressions']
+    assert again.data == [[row[0], row[2], row[1]] for row in report.data]
+    assert again.session is api
+    # changing a returned report doesn't change the cached one
+    rows = [list(row) for row in report.data]
+    report.data[0][1] = -1
+    report.data.append([9, 9, 9])
+    assert api.report(groups=['site_id'], metrics=['impressions', 'clicks'],
+                      where=[['site_id', 'in', [1, 2]]], **closed).data == rows
+    assert cache.report_ttl({'to': '2016-02-01 00:00:00'}) is None
+
+    # ranges that include the current hour expire fast
+    to = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert cache.report_ttl({'to': to.strftime('%Y-%m-%d %H:00:00')}) == 60
+
+    # identical requests in flight are only sent once
+    threads = [threading.Thread(target=api.report,
+                                kwargs=dict(scope='advertisers', groups=['site_id'],
+                                            metrics=['impressions'],
+                                            from_=datetime(2016, 1, 1), to=to))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()['misses'] == 2
+    assert cache.stats()['shared'] + cache.stats()['hits'] == 2 + 3  # 3 of the 4 threads
+    assert len([r for r in mock_server.requests if r[1] == '/v3/report']) == 2
+
+
+def hourly_report_route(bodies):
+    """Creates a ready report with one row per hour and site for the posted range
+    and appends the posted report json to ``bodies``.
+    """
+    from datetime import datetime, timedelta
+
+    def route(params, body, headers):
+        bodies.append(body)
+        hour = datetime.strptime(body['from'], '%Y-%m-%d %H:00:00')
+        to = datetime.strptime(body['to'], '%Y-%m-%d %H:00:00')
+        rows = []
+        while hour < to:
+            rows += [[hour.strftime('%Y-%m-%d %H:00:00'), site, hour.hour * site]
+                     for site in (1, 2)]
+            hour += timedelta(hours=1)
+        return 200, resource_response('report', {
+            'id': 'r', 'columns': ['hour', 'site_id', 'impressions'], 'data': rows,
+            'length': len(rows), 'query': body})
+    return route
+
+
+def test_report_series(mock_server, api, tmp_path):
+    from datetime import datetime
+    from atomx.reporting import ReportSeries
+    bodies = []
+    mock_server.routes[('POST', '/v3/report')] = hourly_report_route(bodies)
+    path = str(tmp_path / 'series.json.gz')
+    series = ReportSeries(api, scope='advertisers', groups=['site_id'],
+                          metrics=['impressions'], path=path)
+    assert series.groups == ['hour', 'site_id']
+
+    report = series.report(datetime(2016, 1, 1), datetime(2016, 1, 2))
+    assert report.length == 48
+    assert report.columns == ['hour', 'site_id', 'impressions']
+
+    # only the new hours are requested
+    report = series.report(datetime(2016, 1, 1, 12), datetime(2016, 1, 2, 3))
+    assert [(b['from'], b['to']) for b in bodies] == [
+        ('2016-01-01 00:00:00', '2016-01-02 00:00:00'),
+        ('2016-01-02 00:00:00', '2016-01-02 03:00:00')]
+    assert report.length == 30
+    assert report.data[0] == ['2016-01-01 12:00:00', 1, 12]
+    assert report.data[-1] == ['2016-01-02 02:00:00', 2, 4]
+
+    # stored hours survive restarts
+    series = ReportSeries(api, scope='advertisers', groups=['site_id'],
+                          metrics=['impressions'], path=path)
+    assert series.update(datetime(2016, 1, 1), datetime(2016, 1, 2, 3)) == 0
+    assert len(series.hours) == 27
+
+    # hours that weren't complete when they were fetched are fetched again
+    series._complete_before = '2016-01-02 02:00:00'
+    assert series.update(datetime(2016, 1, 1), datetime(2016, 1, 2, 3)) == 1
+    assert bodies[-1]['from'] == '2016-01-02 02:00:00'
+
+
+def test_report_split(mock_server, api):
+    from datetime import datetime
+    bodies = []
+
+    def route(params, body, headers):
+        bodies.append(body)
+        hours = (datetime.strptime(body['to'], '%Y-%m-%d %H:00:00') -
+                 datetime.strptime(body['from'], '%Y-%m-%d %H:00:00')).total_seconds() // 3600
+        rows = [[site, hours * site] for site in (1, 2)]
+        return 200, resource_response('report', {
+            'id': 'r', 'columns': ['site_id', 'impressions'], 'data': rows,
+            'length': len(rows), 'totals': {'impressions': hours * 3}, 'query': body})
+    mock_server.routes[('POST', '/v3/report')] = route
+
+    report = api.report(scope='advertisers', groups=['site_id'], metrics=['impressions'],
+                        from_=datetime(2016, 1, 1, 12), to=datetime(2016, 1, 4),
+                        split='day', workers=3, name='sites', save=False)
+    assert sorted((b['from'], b['to']) for b in bodies) == [
+        ('2016-01-01 12:00:00', '2016-01-02 00:00:00'),
+        ('2016-01-02 00:00:00', '2016-01-03 00:00:00'),
+        ('2016-01-03 00:00:00', '2016-01-04 00:00:00')]
+    assert not any(b['save'] for b in bodies)
+    assert all(b['name'] == 'sites' for b in bodies)
+    assert report.name == 'sites'
+    assert report.data == [[1, 60], [2, 120]]
+    assert report.totals == {'impressions': 180}
+    assert report.from_ == datetime(2016, 1, 1, 12)
+    assert report.to == datetime(2016, 1, 4)
+
+    with pytest.raises(ValueError):
+        api.report(scope='advertisers', groups=['site_id'], split='day', limit=10)
+
+
+def test_bulk(mock_server, api):
+    from atomx.models import Domain
+    created = []
+
+    def create(params, body, headers):
+        if isinstance(body, list):
+            if any(d['hostname'] == 'fail' for d in body):
+                return 400, {'success': False, 'error': 'invalid hostname'}
+            domains = [dict(d, id=len(created) + i) for i, d in enumerate(body)]
+            created.extend(domains)
+            return 200, resource_response('domains', domains)
+        if body['hostname'] == 'fail':
+            return 400, {'success': False, 'error': 'invalid hostname'}
+        created.append(dict(body, id=len(created)))
+        return 200, resource_response('domain', created[-1])
+
+    def update(params, body, headers):
+        return 200, resource_response('domain', dict(body, id=1, hostname='updated'))
+
+    mock_server.routes[('POST', '/v3/domain')] = create
+    for i in range(5):
+        mock_server.routes[('PUT', '/v3/domain/{}'.format(i))] = update
+        mock_server.routes[('DELETE', '/v3/domain/{}'.format(i))] = \
+            lambda params, body, headers: (200, resource_response('domain', {}))
+
+    domains = [Domain(hostname='d{}.com'.format(i)) for i in range(4)] + [Domain(hostname='fail')]
+    result = api.bulk_create(domains)
+    assert not result
+    assert len(result.succeeded) == 4 and result.failed[0][0] is domains[-1]
+    assert sorted(d.id for d in result.succeeded) == [0, 1, 2, 3]
+
+    # list POST in batches, a failing batch fails all its models
+    mock_server.requests = []
+    result = api.bulk_create([Domain(hostname='b{}.com'.format(i)) for i in range(5)] +
+                             [Domain(hostname='fail')], batch_size=2)
+    assert len(mock_server.requests) == 3
+    assert sorted(d.id for d in result.succeeded) == [4, 5, 6, 7]
+    assert len(result.failed) == 2
+    with pytest.raises(Exception):
+        result.raise_for_errors()
+
+    domains = [Domain(session=api, id=i, hostname='d{}.com'.format(i)) for i in range(4)]
+    domains[0].state = 'INACTIVE'
+    domains[2].state = 'INACTIVE'
+    mock_server.requests = []
+    result = api.bulk_save(domains)
+    assert result and len(result.succeeded) == 2 and len(result.skipped) == 2
+    assert sorted(r[1] for r in mock_server.requests) == ['/v3/domain/0', '/v3/domain/2']
+    assert domains[0].hostname == 'updated'
+
+    result = api.bulk_delete(domains[:3])
+    assert len(result.succeeded) == 3
+    assert all(d.deleted for d in domains[:3])
+
+
+def test_transaction(mock_server, api):
+    from atomx.models import Campaign, Profile
+    puts = []
+    mock_server.routes[('GET', '/v3/campaigns')] = lambda params, body, headers: (
+        200, resource_response('campaigns', [{'id': i, 'name': 'c{}'.format(i), 'budget': 10}
+                                             for i in range(4)]))
+    mock_server.routes[('POST', '/v3/profile')] = lambda params, body, headers: (
+        200, resource_response('profile', dict(body, id=7)))
+    mock_server.routes[('POST', '/v3/campaign')] = lambda params, body, headers: (
+        200, resource_response('campaign', dict(body, id=8)))
+    for i in range(4):
+        def put(params, body, headers, i=i):
+            puts.append((i, body))
+            return 200, resource_response('campaign', dict(body, id=i))
+        mock_server.routes[('PUT', '/v3/campaign/{}'.format(i))] = put
+    mock_server.routes[('DELETE', '/v3/campaign/3')] = \
+        lambda params, body, headers: (200, resource_response('campaign', {}))
+
+    with api.transaction() as tx:
+        campaigns = api.get('campaigns')
+        for _ in range(3):
+            for campaign in campaigns[:2]:
+                campaign.budget += 5
+        copy = Campaign(session=api, id=1, name='c1', budget=10)
+        tx.add(copy)
+        copy.name = 'renamed'
+        profile = Profile(name='profile')
+        campaign = tx.create(Campaign(name='new', profile=profile))
+        tx.delete(campaigns[3])
+        assert not puts
+    assert sorted(puts) == [(0, {'budget': 25}), (1, {'budget': 25, 'name': 'renamed'})]
+    assert campaigns[1].name == 'renamed' and copy.budget == 25
+    assert profile.id == 7
+    assert campaign.id == 8 and campaign.json['profile'] == 7
+    assert campaigns[3].deleted
+    assert len(tx.result.succeeded) == 5
+
+    # nothing is sent if the block fails
+    puts[:] = []
+    with pytest.raises(KeyError):
+        with api.transaction():
+            api.get('campaigns')[0].budget = 1
+            raise KeyError
+    assert not puts
+
+    # models from the model cache are tracked too
+    from atomx import Atomx
+    cached_api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                       model_cache=True)
+    cached_api.get('campaigns')
+    profile = Profile(session=cached_api, id=5, campaign=2)
+    requests = len(mock_server.requests)
+    with cached_api.transaction():
+        cached_api.get('campaign', 1).name = 'cached'
+        profile.campaign.budget = 1  # lazy loaded from the cache
+        assert len(mock_server.requests) == requests
+    assert sorted(puts) == [(1, {'name': 'cached'}), (2, {'budget': 1})]
+
+
+def throttled_route(rate, status=200):
+    """Route that allows ``rate`` requests per second and answers
+    `429 Too Many Requests` with a `Retry-After` header otherwise.
+    """
+    import time
+    sent = []
+    throttled = []
+    lock = threading.Lock()
+
+    def route(params, body, headers):
+        with lock:
+            now = time.time()
+            recent = [t for t in sent if now - t < 1.0]
+            if len(recent) >= rate:
+                throttled.append(now)
+                return 429, {'success': False, 'error': 'Too many requests'}, \
+                    {'Retry-After': '0.05'}
+            sent.append(now)
+        return status, resource_response('advertiser', {'id': 1})
+    route.throttled = throttled
+    return route
+
+
+def test_retry_and_rate_limit(mock_server):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from atomx import Atomx
+    from atomx.exceptions import APIError
+    from atomx.transport import RateLimiter, RetryPolicy
+    route = throttled_route(rate=20)
+    mock_server.routes[('GET', '/v3/advertiser/1')] = route
+    limiter = RateLimiter(rate=18, burst=1)
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                rate_limiter=limiter)
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: api.get('advertiser', 1), range(27)))
+    # 1 (login) + 27 requests at 18 per second
+    assert time.time() - start > 1.3
+    assert all(r.id == 1 for r in results)
+    assert not route.throttled
+
+    # without rate limiter the throttled requests are retried after `Retry-After`
+    route = throttled_route(rate=5)
+    mock_server.routes[('GET', '/v3/advertiser/1')] = route
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                retry=RetryPolicy(retries=100))
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: api.get('advertiser', 1), range(8)))
+    assert all(r.id == 1 for r in results)
+    assert route.throttled
+
+    # server errors are only retried for idempotent requests
+    failures = []
+
+    def unavailable(params, body, headers):
+        failures.append(1)
+        if len(failures) % 3:
+            return 503, {'success': False, 'error': 'unavailable'}
+        return 200, resource_response('advertiser', {'id': 1})
+    mock_server.routes[('GET', '/v3/advertiser/1')] = unavailable
+    mock_server.routes[('POST', '/v3/advertiser')] = unavailable
+    api.retry = RetryPolicy(backoff=0.01)
+    assert api.get('advertiser', 1).id == 1
+    assert len(failures) == 3
+    with pytest.raises(APIError):
+        api.post('advertiser', {'name': 'test'})
+    assert len(failures) == 4
+    api.retry = None
+    with pytest.raises(APIError):
+        api.get('advertiser', 1)
+    assert len(failures) == 5
+
+
+def test_retry_closes_responses(mock_server, api):
+    from atomx.transport import RetryPolicy
+    statuses = [429, 200]
+    mock_server.routes[('GET', '/v3/advertiser/1')] = lambda params, body, headers: (
+        statuses.pop(0), resource_response('advertiser', {'id': 1}), {'Retry-After': '0'})
+    api.retry = RetryPolicy(backoff=0.01)
+    responses = []
+    api.hooks['response'].append(lambda method, url, r, seconds: responses.append(r))
+    assert [a.id for a in api.stream('advertiser', 1)] == [1]  # throttled and retried
+    assert [r.status_code for r in responses] == [429, 200]
+    assert responses[0].raw.closed
+
+
+def test_circuit_breaker(mock_server):
+    import time
+    from atomx import Atomx
+    from atomx.exceptions import APIError, CircuitOpenError
+    from atomx.transport import CircuitBreaker
+    status = [500]
+    mock_server.routes[('GET', '/v3/advertiser/1')] = lambda params, body, headers: (
+        status[0], resource_response('advertiser', {'id': 1}) if status[0] == 200 else
+        {'success': False, 'error': 'error'})
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                retry=None, circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(APIError):
+            api.get('advertiser', 1)
+    requests = len(mock_server.requests)
+    with pytest.raises(CircuitOpenError):
+        api.get('advertiser', 1)
+    assert len(mock_server.requests) == requests
+    assert breaker.state == breaker.OPEN
+
+    time.sleep(0.25)
+    status[0] = 200
+    assert api.get('advertiser', 1).id == 1
+    assert breaker.state == breaker.CLOSED
+
+
+def test_stats(mock_server):
+    from atomx import Atomx
+    from atomx.stats import endpoint_name
+    mock_server.routes[('GET', '/v3/campaigns')] = lambda params, body, headers: (
+        200, resource_response('campaigns', [{'id': i, 'profile': i} for i in range(3)]))
+    for i in range(3):
+        mock_server.routes[('GET', '/v3/campaign/{}/profile'.format(i))] = \
+            lambda params, body, headers, i=i: (200, resource_response('profile', {'id': i}))
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint, stats=True)
+    responses = []
+    api.hooks['response'].append(lambda method, url, r, seconds: responses.append(url))
+
+    assert endpoint_name('campaign/42/profile') == 'campaign/:id/profile'
+    assert endpoint_name('42') == ':id'
+    for campaign in api.get('campaigns'):
+        campaign.profile
+    with pytest.raises(Exception):
+        api.get('missing')
+
+    stats = api.stats.as_dict()
+    assert stats['requests']['GET campaigns']['latency']['count'] == 1
+    assert stats['requests']['GET campaigns']['bytes_in'] > 0
+    assert stats['requests']['GET campaign/:id/profile']['statuses'] == {200: 3}
+    assert stats['requests']['GET missing']['statuses'] == {404: 1}
+    assert stats['requests']['POST login']['bytes_out'] > 0
+    assert stats['models'] == 3 + 3  # campaigns, profiles
+    assert stats['decode']['count'] == 5
+    assert stats['lazy_loads'] == {'Campaign.profile': 3}
+    assert len(responses) == 5
+
+    text = api.stats.prometheus()
+    assert 'atomx_request_duration_seconds_count{method="GET",endpoint="campaigns"} 1' in text
+    assert 'atomx_lazy_loads_total{model="Campaign",attribute="profile"} 3' in text
+    assert 'atomx_responses_total{method="GET",endpoint="missing",status="404"} 1' in text
+
+
+def test_lazy_load_tracer(mock_server):
+    import warnings
+    from atomx import Atomx
+    from atomx.debug import LazyLoadTracer
+    from atomx.exceptions import LazyLoadError, LazyLoadWarning
+    mock_server.routes[('GET', '/v3/campaigns')] = lambda params, body, headers: (
+        200, resource_response('campaigns', [{'id': i, 'profile': i} for i in range(5)]))
+    for i in range(5):
+        mock_server.routes[('GET', '/v3/campaign/{}/profile'.format(i))] = \
+            lambda params, body, headers, i=i: (200, resource_response('profile', {'id': i}))
+    tracer = LazyLoadTracer(threshold=3)
+    api = Atomx('user@example.com', 'password', api_endpoint=mock_server.endpoint,
+                lazy_load_tracer=tracer)
+    campaigns = api.get('campaigns')
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        for campaign in campaigns[:4]:
+            campaign.profile
+    assert [w.category for w in caught] == [LazyLoadWarning]
+    assert 'Campaign.profile' in str(caught[0].message)
+    assert caught[0].filename == __file__
+
+    [(model, attribute, count, call_site)] = tracer.summary()
+    assert (model, attribute, count) == ('Campaign', 'profile', 4)
+    assert call_site[0] == __file__ and call_site[3] == 'campaign.profile'
+    assert [load.id for load in tracer.loads] == [0, 1, 2, 3]
+
+    requests = len(mock_server.requests)
+    with tracer.forbidden():
+        with pytest.raises(LazyLoadError):
+            campaigns[4].profile
+    assert len(mock_server.requests) == requests
+    assert campaigns[4].json == {'id': 4, 'profile': 4}  # the reference is kept
+    assert campaigns[4].profile.id == 4
+
+    tracer.mode = 'raise'
+    campaign = api.get('campaigns')[0]
+    with pytest.raises(LazyLoadError):
+        campaign.profile
+    assert campaign.json == {'id': 0, 'profile': 0}